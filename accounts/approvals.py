@@ -0,0 +1,108 @@
+"""
+The user approval queue (pending_users).
+
+Registrations are listed newest first and keyset-paginated (see
+lostandfound/pagination.py) with both profiles and the approving admin joined
+in, so a page costs one query however long the queue gets.
+
+Search matches the start of any word typed against the first name, last
+name, username, email or student ID, ignoring case. Each of those has an
+index on its lowercased value that answers "starts with":
+- Postgres: lower(email) LIKE 'jo%', from a text_pattern_ops index
+  (migration 0007), which compares characters rather than following the
+  database collation, so it is right under any locale.
+- SQLite: a range, lower(email) >= 'jo' AND lower(email) < 'jp', from the
+  plain Lower() index (SQLite can't use one for LIKE). SQLite compares
+  strings in code point order, where that range is exactly the strings
+  starting with 'jo'. Its lower() only folds ASCII letters, so the query is
+  folded the same way and accented letters have to match in case.
+
+Approving or rejecting the ticked registrations is a single UPDATE. It
+sends no signals, so the logged-in user cache entries of those users are
+dropped here instead (see accounts/backends.py).
+"""
+import string
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .backends import forget_users
+from .models import CustomUser, StudentProfile
+
+# Tabs on the Manage User Registrations page
+USER_FILTERS = ('pending', 'approved', 'rejected', 'all')
+
+USER_ORDERING = ('-date_joined', '-id')
+USERS_PER_PAGE = 30
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'username', 'email')
+
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold(text):
+    """Lowercase `text` the way the database's lower() does"""
+    if connection.vendor == 'sqlite':
+        return text.translate(ASCII_LOWER)
+    return text.lower()
+
+
+def prefix_end(prefix):
+    """
+    First string after everything starting with `prefix`, in code point
+    order: 'jo' -> 'jp'. None if there is none.
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates can't be stored, skip past them
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+
+def starts_with(field, prefix):
+    """`field` (already lowercased) starts with `prefix`, see the module docstring"""
+    if connection.vendor != 'sqlite':
+        return Q(**{f'{field}__startswith': prefix})
+    end = prefix_end(prefix)
+    if end is None:
+        return Q(**{f'{field}__gte': prefix})
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': end})
+
+
+def search_users(users, query):
+    """Users matching every word of `query` in one of the searched fields"""
+    users = users.alias(**{f'{field}_lower': Lower(field) for field in SEARCH_FIELDS})
+    for word in fold(query).split():
+        students = StudentProfile.objects.alias(student_id_lower=Lower('student_id'))
+        matches = Q(pk__in=students.filter(starts_with('student_id_lower', word)).values('user_id'))
+        for field in SEARCH_FIELDS:
+            matches |= starts_with(f'{field}_lower', word)
+        users = users.filter(matches)
+    return users
+
+
+def user_queue(status_filter, query=''):
+    """Registrations shown on a tab, admins never need approving"""
+    users = CustomUser.objects.exclude(user_type='admin')
+    if status_filter != 'all':
+        users = users.filter(approval_status=status_filter)
+    if query:
+        users = search_users(users, query)
+    return users.select_related('student_profile', 'teacher_profile', 'approved_by')
+
+
+def decide_users(user_ids, admin, status):
+    """Approve or reject the pending registrations among `user_ids`, returns how many"""
+    with transaction.atomic():
+        decided = CustomUser.objects.filter(pk__in=user_ids, approval_status='pending').update(
+            approval_status=status,
+            approved_by=admin,
+            approval_date=timezone.now(),
+        )
+    forget_users(user_ids)
+    return decided
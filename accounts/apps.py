@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from .backends import user_changed
+
+        # Logged-in users are cached by CachedModelBackend, drop them when they change
+        CustomUser = self.get_model('CustomUser')
+        post_save.connect(user_changed, sender=CustomUser)
+        post_delete.connect(user_changed, sender=CustomUser)
@@ -0,0 +1,44 @@
+"""
+Authentication backend that keeps logged-in users in the cache.
+
+AuthenticationMiddleware looks the user up on every request, which
+ModelBackend does with a query. Here the user comes from the cache for
+USER_CACHE_TIMEOUT seconds (0 turns caching off). Saving or deleting a
+CustomUser drops its entry (see accounts/apps.py), so approvals, role and
+password changes apply from the next request on. Bulk .update() calls on
+users send no signals and must call forget_user() (or forget_users()) for every user they change.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'users:{user_id}'
+
+
+def forget_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def forget_users(user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        timeout = settings.USER_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(user_id)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
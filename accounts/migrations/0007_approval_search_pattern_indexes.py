@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# Postgres only: LIKE 'jo%' on lower(x) can use these whatever the database
+# collation. On SQLite the Lower() indexes from 0006 answer a range instead.
+PATTERN_INDEXES = [
+    ('user_first_name_pattern_idx', 'accounts_customuser', 'first_name'),
+    ('user_last_name_pattern_idx', 'accounts_customuser', 'last_name'),
+    ('user_username_pattern_idx', 'accounts_customuser', 'username'),
+    ('user_email_pattern_idx', 'accounts_customuser', 'email'),
+    ('student_id_pattern_idx', 'accounts_studentprofile', 'student_id'),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, column in PATTERN_INDEXES:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} (lower({column}) text_pattern_ops)')
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, table, column in PATTERN_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_approval_queue_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_indexes, reverse_code=drop_pattern_indexes),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 
 # Create your models here.
@@ -18,6 +19,22 @@ class CustomUser(AbstractUser):
     approved_by = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_users')
     approval_date = models.DateTimeField(null=True, blank=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Duplicate email check during registration
+            models.Index(fields=['email'], name='user_email_idx'),
+            # User approval queue, newest registrations first
+            models.Index(fields=['approval_status', '-date_joined'], name='user_approval_joined_idx'),
+            # "All" tab of the approval queue
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+            # Approval queue search, case-insensitive "starts with" (see accounts/approvals.py,
+            # Postgres also gets text_pattern_ops versions in migration 0007)
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         return self.username
     
@@ -27,6 +44,14 @@ class StudentProfile(models.Model):
     grade = models.IntegerField(choices=[(i, f'Grade {i}') for i in range(9,13)])
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Duplicate student ID check during registration
+            models.Index(fields=['student_id'], name='student_id_idx'),
+            # Approval queue search (see accounts/approvals.py)
+            models.Index(Lower('student_id'), name='student_id_lower_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - Student"
 
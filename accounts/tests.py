@@ -1,3 +1,34 @@
-from django.test import TestCase
+from lostandfound.testing import QueryCountTestMixin, SeededTestCase
 
-# Create your tests here.
+from .approvals import USER_FILTERS
+from .models import CustomUser
+
+
+class AccountQueryCountTests(QueryCountTestMixin, SeededTestCase):
+    query_count_urlconfs = ('accounts.urls',)
+
+    def test_query_counts(self):
+        pending = CustomUser.objects.create_user('newstudent', 'new@example.com', 'password123', approval_status='pending')
+        self.client.force_login(self.staff)
+        self.assertQueryCounts({
+            # The first page also loads the user into the cache
+            'home': 2,
+            'register_student': 0,
+            'register_teacher': 0,
+            'login': 0,
+            'pending_users': 1,
+            # POST only, a GET stops at the login check
+            'bulk_user_action': 0,
+            ('approve_user', pending.pk): 2,
+            # Last, it ends the session
+            'logout': 2,
+        })
+
+    def test_approval_queue_query_counts(self):
+        self.client.force_login(self.staff)
+        for status in USER_FILTERS:
+            with self.subTest(status=status):
+                # The first tab also loads the user into the cache
+                self.assertQueryCount(f'/pending-users/?status={status}', 2 if status == USER_FILTERS[0] else 1)
+        self.assertQueryCount('/pending-users/?status=all&q=seed1', 1)
+        self.assertNoRepeatedQueries('/pending-users/?status=all')
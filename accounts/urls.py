@@ -7,5 +7,6 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('pending-users/', views.pending_users, name='pending_users'),
+    path('pending-users/bulk/', views.bulk_user_action, name='bulk_user_action'),
     path('approve-user/<int:user_id>/', views.approve_user, name='approve_user'),
 ]
\ No newline at end of file
@@ -1,32 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
+from .approvals import USER_FILTERS, USER_ORDERING, USERS_PER_PAGE, decide_users, user_queue
 from .models import CustomUser, StudentProfile, TeacherProfile
+from claims.bulk import MAX_SELECTION, selected_ids
 from items.models import Item
+from lostandfound.pagination import paginate_keyset, wants_partial
+from lostandfound.queries import query_budget
 
 # Create your views here.
+@query_budget(3)
 def home(request):
-    # Get recent items if user is logged in
-    recent_items = None
-    pending_approval_items = None
-    slider_items = Item.objects.filter(status__in=['unclaimed', 'rejected']).order_by('-created_at')[:8]
-
-    if request.user.is_authenticated:
-        # For admins/teachers, show items pending approval
-        if request.user.is_staff or request.user.user_type in ['teacher', 'admin']:
-            pending_approval_items = Item.objects.filter(status='reported').order_by('-created_at')[:5]
-            recent_items = Item.objects.filter(status__in=['unclaimed', 'rejected']).order_by('-created_at')[:3]
-        else:
-            # For students, show unclaimed items
-            recent_items = Item.objects.filter(status__in=['unclaimed', 'rejected']).order_by('-created_at')[:3]
-
-    return render(request, 'home.html', {
-        'recent_items': recent_items,
-        'pending_approval_items': pending_approval_items,
-        'slider_items': slider_items
-    })
+    # Lazy, only runs when the cached slider fragment has expired (see items/fragments.py)
+    slider_items = Item.objects.filter(status__in=['unclaimed', 'rejected']).for_cards().order_by('-created_at')[:8]
+    return render(request, 'home.html', {'slider_items': slider_items})
 
 def register_student(request):
     if request.method == 'POST':
@@ -154,25 +146,62 @@ def logout_view(request):
     return redirect('login')
 
 @login_required
+@query_budget(3)
 def pending_users(request):
     # Only admins can access this page
     if not (request.user.is_staff or request.user.user_type == 'admin'):
         messages.error(request, 'You do not have permission to access this page.')
         return redirect('home')
 
-    # Get filter status
+    # Get filter status and search
     status_filter = request.GET.get('status', 'pending')
+    if status_filter not in USER_FILTERS:
+        status_filter = 'pending'
+    search = request.GET.get('q', '').strip()
 
-    if status_filter == 'all':
-        users = CustomUser.objects.exclude(user_type='admin').order_by('-date_joined')
-    else:
-        users = CustomUser.objects.filter(approval_status=status_filter).exclude(user_type='admin').order_by('-date_joined')
+    page = paginate_keyset(user_queue(status_filter, search), request.GET.get('cursor'),
+                           ordering=USER_ORDERING, per_page=USERS_PER_PAGE, params=request.GET)
+
+    if wants_partial(request):
+        return render(request, 'accounts/_user_page.html', {'page': page})
 
     return render(request, 'accounts/pending_users.html', {
-        'users': users,
-        'current_filter': status_filter
+        'users': page,
+        'page': page,
+        'current_filter': status_filter,
+        'search': search,
     })
 
+#Approve or reject every ticked registration of pending_users at once
+@login_required
+@require_POST
+@query_budget(5)
+def bulk_user_action(request):
+    if not (request.user.is_staff or request.user.user_type == 'admin'):
+        messages.error(request, 'You do not have permission to perform this action.')
+        return redirect('home')
+
+    action = request.POST.get('action')
+    ids = selected_ids(request.POST.getlist('selected'))
+    status_filter = request.POST.get('status')
+    if status_filter not in USER_FILTERS:
+        status_filter = 'pending'
+    back = redirect(f"{reverse('pending_users')}?{urlencode({'status': status_filter, 'q': request.POST.get('q', '')})}")
+
+    if not ids:
+        messages.warning(request, 'Select at least one registration first.')
+    elif len(ids) > MAX_SELECTION:
+        messages.error(request, f'{len(ids)} registrations selected, select at most {MAX_SELECTION} at a time. Nothing was changed.')
+    elif action == 'approve':
+        done = decide_users(ids, request.user, 'approved')
+        messages.success(request, f'{done} user(s) approved.')
+    elif action == 'reject':
+        done = decide_users(ids, request.user, 'rejected')
+        messages.success(request, f'{done} user(s) rejected.')
+    else:
+        messages.error(request, 'Unknown action.')
+    return back
+
 @login_required
 def approve_user(request, user_id):
     # Only admins can approve users
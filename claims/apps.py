@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ClaimsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'claims'
+
+    def ready(self):
+        from items.models import Item
+        from .queues import clear_queue_counts
+
+        # Drop the cached Manage Claims counts when a queue may have changed
+        for model in (self.get_model('Claim'), Item):
+            post_save.connect(clear_queue_counts, sender=model)
+            post_delete.connect(clear_queue_counts, sender=model)
@@ -0,0 +1,102 @@
+"""
+Bulk actions on the staff queues (Manage Claims page).
+
+Staff tick any number of reports or claims and act on all of them at once.
+Every action is one transaction of set-based UPDATEs, whatever the size of
+the selection: the WHERE clause keeps only the rows the action still applies
+to (a report approved by someone else a moment ago is skipped, not approved
+twice), so nothing is read first. Saving rows one by one would cost a SELECT
+and an UPDATE per row plus the signal receivers, so the caches those
+receivers would clear are cleared here instead.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from items.facets import bump_facet_version
+from items.fragments import bump_item_version
+from items.models import Item
+
+from .models import Claim
+from .queues import clear_queue_counts
+
+# Bounds the IN (...) list, about 10 fully loaded pages of a queue. Larger
+# selections are refused rather than cut short.
+MAX_SELECTION = 500
+
+# Items can be discarded in any state but these
+UNDISCARDABLE_STATUSES = ['discarded', 'returned']
+
+# Rejecting a claim makes its item available again, unless another claim was approved meanwhile
+REOPENABLE_STATUSES = ['unclaimed', 'claimed']
+
+
+def selected_ids(values):
+    """Primary keys from the ticked checkboxes, ignoring anything that isn't one"""
+    return sorted({int(value) for value in values if value.isdigit()})
+
+
+def queues_changed():
+    bump_facet_version()
+    bump_item_version()
+    clear_queue_counts()
+
+
+def approve_reports(item_ids, user, notes=''):
+    """Approve the reports among `item_ids`, returns how many were approved"""
+    now = timezone.now()
+    with transaction.atomic():
+        approved = Item.objects.filter(pk__in=item_ids, status='reported').update(
+            status='unclaimed',
+            approval_date=now,
+            approval_notes=notes,
+            approved_by=user,
+            updated_at=now,
+        )
+    if approved:
+        queues_changed()
+    return approved
+
+
+def discard_items(item_ids, user, reason, notes=''):
+    """Discard `item_ids` (those not already discarded or returned), returns how many"""
+    now = timezone.now()
+    with transaction.atomic():
+        discarded = Item.objects.filter(pk__in=item_ids).exclude(status__in=UNDISCARDABLE_STATUSES).update(
+            status='discarded',
+            discard_date=now,
+            discard_reason=reason,
+            discard_notes=notes,
+            discarded_by=user,
+            updated_at=now,
+        )
+    if discarded:
+        queues_changed()
+    return discarded
+
+
+def discard_claimed_items(claim_ids, user, reason, notes=''):
+    """Discard the items the claims `claim_ids` are for, returns how many"""
+    item_ids = Claim.objects.filter(pk__in=claim_ids).values('item_id')
+    return discard_items(item_ids, user, reason, notes)
+
+
+def reject_claims(claim_ids, user, notes=''):
+    """Reject the pending claims among `claim_ids`, returns how many were rejected"""
+    now = timezone.now()
+    with transaction.atomic():
+        pending = Claim.objects.filter(pk__in=claim_ids, status='pending')
+        # Items first, while the subquery still finds the claims as pending
+        Item.objects.filter(pk__in=pending.values('item_id'), status__in=REOPENABLE_STATUSES).update(
+            status='rejected',
+            updated_at=now,
+        )
+        rejected = pending.update(
+            status='rejected',
+            reviewed_by=user,
+            reviewed_at=now,
+            admin_notes=notes,
+            updated_at=now,
+        )
+    if rejected:
+        queues_changed()
+    return rejected
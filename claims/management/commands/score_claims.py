@@ -0,0 +1,27 @@
+"""
+Management command to (re)compute claim match scores
+Usage: python manage.py score_claims [--all]
+"""
+from django.core.management.base import BaseCommand
+from claims.models import Claim
+from claims.scoring import OPEN_STATUSES, score_claims
+
+
+class Command(BaseCommand):
+    help = 'Scores how well each open claim matches the item it claims'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rescore every claim, including completed ones',
+        )
+
+    def handle(self, *args, **options):
+        claims = Claim.objects.all()
+        if not options['all']:
+            claims = claims.filter(status__in=OPEN_STATUSES)
+
+        scored = score_claims(claims)
+
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} claims.'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0001_initial'),
+        ('items', '0013_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['status', '-created_at'], name='claim_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['item', 'claimant'], name='claim_pending_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['claimant', '-created_at'], name='claim_claimant_created_idx'),
+        ),
+    ]
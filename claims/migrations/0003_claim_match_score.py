@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0002_hot_path_indexes'),
+        ('items', '0013_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='match_score',
+            field=models.FloatField(blank=True, help_text='How closely the claim text matches the item (0-1), see claims/scoring.py', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['item', '-match_score'], name='claim_item_score_idx'),
+        ),
+    ]
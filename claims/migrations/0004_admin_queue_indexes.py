@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('claims', '0003_claim_match_score'),
+        ('items', '0017_admin_queue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='claim',
+            name='claim_status_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='claim_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'approved', 'rejected'])), fields=['-created_at', '-id'], name='claim_actionable_created_idx'),
+        ),
+    ]
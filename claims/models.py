@@ -30,6 +30,7 @@ class Claim(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     reviewed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_claims')
     admin_notes = models.TextField(blank=True, null=True, help_text="Admin notes")
+    match_score = models.FloatField(null=True, blank=True, help_text="How closely the claim text matches the item (0-1), see claims/scoring.py")
 
     #Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -38,6 +39,24 @@ class Claim(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Staff claim queues filtered by status, newest first
+            models.Index(fields=['status', '-created_at', '-id'], name='claim_status_created_idx'),
+            # "All Pending" tab: every claim still needing attention, newest first
+            models.Index(
+                fields=['-created_at', '-id'], name='claim_actionable_created_idx',
+                condition=models.Q(status__in=['pending', 'approved', 'rejected']),
+            ),
+            # "Already have a pending claim?" check in submit_claim
+            models.Index(
+                fields=['item', 'claimant'], name='claim_pending_item_idx',
+                condition=models.Q(status='pending'),
+            ),
+            # My Claims page
+            models.Index(fields=['claimant', '-created_at'], name='claim_claimant_created_idx'),
+            # Claims on the same item, best match first
+            models.Index(fields=['item', '-match_score'], name='claim_item_score_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_claim_type_display()} for {self.item.name} by {self.claimant.username}"
\ No newline at end of file
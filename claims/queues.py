@@ -0,0 +1,83 @@
+"""
+The staff work queues on the Manage Claims page (admin_claims).
+
+All tab counts come from one statement: claims grouped by status, combined
+(UNION ALL) with the count of reports waiting for approval. Both halves are
+answered from status indexes. The result is cached for a short time and
+dropped whenever a claim or item is saved or deleted, so the badge is fresh
+after staff act but a page left open and refreshed all day costs no counting.
+
+The lists themselves are keyset-paginated (see lostandfound/pagination.py)
+with the related rows the cards show joined in.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+from items.models import Item
+
+from .models import Claim
+
+QUEUE_COUNTS_KEY = 'claim_queues:counts'
+QUEUE_COUNTS_TIMEOUT = 30
+
+# Claims that still need a decision or a pickup
+ACTIONABLE_STATUSES = ['pending', 'approved', 'rejected']
+
+CLAIMS_PER_PAGE = 20
+REPORTS_PER_PAGE = 20
+
+NEWEST_ORDERING = ('-created_at', '-id')
+# Claims grouped by item with the best match first, unscored claims last
+MATCH_ORDERING = ('item_id', '-score', '-created_at', '-id')
+
+
+def queue_counts():
+    """{'pending_approval', 'pending', 'approved', 'rejected', 'completed', 'all', 'all_actionable'}"""
+    counts = cache.get(QUEUE_COUNTS_KEY)
+    if counts is not None:
+        return counts
+
+    claims = Claim.objects.order_by().values('status').annotate(count=Count('id'))
+    # 'reported' is never a claim status, so the two halves can't collide
+    reports = Item.objects.filter(status='reported').order_by().values('status').annotate(count=Count('id'))
+    by_status = {row['status']: row['count'] for row in claims.union(reports, all=True)}
+
+    counts = {status: by_status.get(status, 0) for status, _ in Claim.STATUS_CHOICES}
+    counts['pending_approval'] = by_status.get('reported', 0)
+    counts['all'] = sum(counts[status] for status in ACTIONABLE_STATUSES)
+    counts['all_actionable'] = counts['pending_approval'] + counts['all']
+
+    cache.set(QUEUE_COUNTS_KEY, counts, QUEUE_COUNTS_TIMEOUT)
+    return counts
+
+
+def clear_queue_counts(sender=None, **kwargs):
+    """Signal receiver, also safe to call directly"""
+    cache.delete(QUEUE_COUNTS_KEY)
+
+
+def claim_queue(status_filter, sort='newest'):
+    """
+    The claims shown on a tab and the ordering to paginate them by.
+    'all' means every claim that still needs attention.
+    """
+    if status_filter == 'all':
+        claims = Claim.objects.filter(status__in=ACTIONABLE_STATUSES)
+    else:
+        claims = Claim.objects.filter(status=status_filter)
+
+    claims = claims.select_related('item', 'claimant', 'item__submitted_by')
+    if status_filter == 'completed':
+        claims = claims.select_related('item__returned_to')
+
+    if sort == 'match':
+        return claims.annotate(score=Coalesce('match_score', -1.0)), MATCH_ORDERING
+    return claims, NEWEST_ORDERING
+
+
+def report_queue():
+    """Items waiting for approval, with who reported them"""
+    return Item.objects.filter(status='reported').for_cards(
+        'submitted_by__username', 'submitted_by__first_name', 'submitted_by__last_name'
+    ).select_related('submitted_by')
@@ -0,0 +1,138 @@
+"""
+Match scores for claims.
+
+Each claim's text (description + additional proof) is compared with the text
+of the item it claims (name, category, location, description) using TF-IDF
+weighted cosine similarity. Words are hashed into a fixed number of columns so
+a whole batch becomes one NumPy matrix; there is no per-claim Python maths.
+
+Scores go from 0 (nothing in common) to 1 and are stored on Claim.match_score
+so staff can see the most convincing claim for an item first.
+"""
+import re
+import zlib
+
+import numpy as np
+
+from .models import Claim
+
+# Hashed vocabulary size, collisions are rare enough at this size for short texts
+FEATURES = 2 ** 12
+
+# Claims scored per matrix. A chunk (claims + their items) is about
+# 2 * CHUNK_SIZE rows of FEATURES float32s, 8MB per copy. Chunks only end
+# between items, IDF is per chunk and an item's claims must be comparable,
+# so an item with more claims than this gets a bigger chunk.
+CHUNK_SIZE = 500
+
+# Claims that can still change hands get scored
+OPEN_STATUSES = ['pending', 'approved', 'rejected']
+
+STOP_WORDS = frozenset('''
+a an and are as at be but by for from has have i in is it its my of on or that the
+this to was were with me mine our your you he she they them his her their there
+'''.split())
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _hash(word):
+    return zlib.crc32(word.encode()) % FEATURES
+
+
+def _hashed_words(text):
+    words = WORD_RE.findall((text or '').lower())
+    return [_hash(word) for word in words if word not in STOP_WORDS and len(word) > 1]
+
+
+def _term_counts(texts):
+    """Sparse term counts for `texts` as one dense (len(texts), FEATURES) matrix"""
+    rows = []
+    columns = []
+    for row, text in enumerate(texts):
+        hashed = _hashed_words(text)
+        rows.extend([row] * len(hashed))
+        columns.extend(hashed)
+
+    counts = np.zeros((len(texts), FEATURES), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), 1)
+    return counts
+
+
+def similarity_scores(claim_texts, item_texts, item_index):
+    """
+    Cosine similarity between every claim and its item.
+
+    `item_texts` holds each distinct item once, `item_index[i]` is the position
+    in `item_texts` of the item that claim i is for.
+    """
+    if not claim_texts:
+        return np.zeros(0, dtype=np.float32)
+
+    counts = _term_counts(list(claim_texts) + list(item_texts))
+
+    # Sublinear TF and smoothed IDF over this batch of claims and items
+    tf = np.log1p(counts)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    documents = counts.shape[0]
+    idf = np.log((1 + documents) / (1 + document_frequency)) + 1
+    vectors = tf * idf.astype(np.float32)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+
+    claim_vectors = vectors[:len(claim_texts)]
+    item_vectors = vectors[len(claim_texts):][np.asarray(item_index, dtype=np.intp)]
+    return np.einsum('ij,ij->i', claim_vectors, item_vectors)
+
+
+def claim_text(claim):
+    return f'{claim.description} {claim.additional_proof or ""}'
+
+
+def item_text(item):
+    return f'{item.name} {item.get_category_display()} {item.location_found} {item.description}'
+
+
+def _score_chunk(claims):
+    items = {}
+    item_index = []
+    for claim in claims:
+        position = items.setdefault(claim.item_id, len(items))
+        item_index.append(position)
+
+    item_texts = [None] * len(items)
+    for claim in claims:
+        item_texts[items[claim.item_id]] = item_text(claim.item)
+
+    scores = similarity_scores([claim_text(claim) for claim in claims], item_texts, item_index)
+    for claim, score in zip(claims, scores.tolist()):
+        claim.match_score = round(score, 4)
+    Claim.objects.bulk_update(claims, ['match_score'], batch_size=500)
+
+
+def score_claims(queryset):
+    """Score and save every claim in `queryset`, in chunks. Returns how many were scored."""
+    queryset = queryset.select_related('item').only(
+        'id', 'description', 'additional_proof', 'item',
+        'item__name', 'item__category', 'item__location_found', 'item__description',
+    ).order_by('item_id', 'pk')
+
+    scored = 0
+    chunk = []
+    for claim in queryset.iterator(chunk_size=CHUNK_SIZE):
+        # Claims on the same item always share a chunk
+        if len(chunk) >= CHUNK_SIZE and claim.item_id != chunk[-1].item_id:
+            _score_chunk(chunk)
+            scored += len(chunk)
+            chunk = []
+        chunk.append(claim)
+    if chunk:
+        _score_chunk(chunk)
+        scored += len(chunk)
+    return scored
+
+
+def score_item_claims(item_ids):
+    """Rescore the open claims on the given items, e.g. after a new claim arrives"""
+    return score_claims(Claim.objects.filter(item_id__in=item_ids, status__in=OPEN_STATUSES))
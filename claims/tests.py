@@ -1,3 +1,41 @@
-from django.test import TestCase
+from items.models import Item
+from lostandfound.testing import QueryCountTestMixin, SeededTestCase
 
-# Create your tests here.
+from .models import Claim
+from .views import QUEUE_FILTERS
+
+
+class ClaimQueryCountTests(QueryCountTestMixin, SeededTestCase):
+    query_count_urlconfs = ('claims.urls',)
+
+    def setUp(self):
+        super().setUp()
+        self.item = Item.objects.filter(status='unclaimed').order_by('pk').first()
+        self.claim = Claim.objects.filter(status='pending').order_by('pk').first()
+
+    def test_query_counts(self):
+        self.client.force_login(self.staff)
+        self.assertQueryCounts({
+            # The first page also loads the user into the cache
+            ('submit_claim', self.item.pk): 4,
+            ('submit_claim_typed', self.item.pk, 'inquiry'): 3,
+            'my_claims': 1,
+            'admin_claims': 2,
+            # POST only, a GET stops at the login check
+            'bulk_action': 0,
+            ('review_claim', self.claim.pk): 4,
+        })
+
+    def test_queue_tab_query_counts(self):
+        self.client.force_login(self.staff)
+        # The first tab also loads the user and counts the queues, later ones find both cached
+        expected = {'pending_approval': 3, 'pending': 1, 'approved': 1, 'rejected': 1, 'all': 2, 'completed': 1}
+        for status in QUEUE_FILTERS:
+            with self.subTest(status=status):
+                self.assertQueryCount(f'/claims/admin/?status={status}', expected[status])
+                self.assertNoRepeatedQueries(f'/claims/admin/?status={status}')
+
+    def test_claimant_query_counts(self):
+        self.client.force_login(self.claim.claimant)
+        # Includes loading the user into the cache
+        self.assertQueryCount('/claims/my-claims/', 2)
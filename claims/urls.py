@@ -6,5 +6,6 @@ urlpatterns = [
     path('<int:item_pk>/submit/<str:claim_type>/', views.submit_claim, name='submit_claim_typed'),
     path('my-claims/', views.my_claims, name='my_claims'),
     path('admin/', views.admin_claims, name='admin_claims'),
+    path('admin/bulk/', views.bulk_action, name='bulk_action'),
     path('admin/<int:claim_pk>/review/', views.review_claim, name='review_claim'),
 ]
\ No newline at end of file
@@ -1,13 +1,24 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import F
 from django.utils import timezone
+from django.views.decorators.http import require_POST
 from items.models import Item
+from lostandfound.pagination import paginate_keyset, wants_partial
+from lostandfound.queries import query_budget
+from . import bulk
 from .models import Claim
 from .forms import ClaimForm
+from .queues import CLAIMS_PER_PAGE, REPORTS_PER_PAGE, claim_queue, queue_counts, report_queue
+from .scoring import score_item_claims
 
 # Create your views here.
 
+# Tabs on the Manage Claims page
+QUEUE_FILTERS = ('pending_approval', 'pending', 'approved', 'rejected', 'all', 'completed')
+
 #Submission
 @login_required
 def submit_claim(request, item_pk, claim_type=None):
@@ -35,6 +46,8 @@ def submit_claim(request, item_pk, claim_type=None):
             claim.item = item
             claim.claimant = request.user
             claim.save()
+            # Rescore every open claim on this item so they can be compared side by side
+            score_item_claims([item.pk])
             messages.success(request, f'Your {claim.get_claim_type_display().lower()} has been submitted successfully!')
             return redirect('my_claims')
     else:
@@ -48,12 +61,14 @@ def submit_claim(request, item_pk, claim_type=None):
 
 #View own cliams
 @login_required
+@query_budget(3)
 def my_claims(request):
-    claims = Claim.objects.filter(claimant=request.user)
+    claims = Claim.objects.filter(claimant=request.user).select_related('item')
     return render(request, 'claims/my_claims.html', {'claims': claims})
 
 #Admin view to see all claims
 @login_required
+@query_budget(5)
 def admin_claims(request):
     if not (request.user.is_staff or request.user.user_type == 'teacher'):
         messages.error(request, 'You do not have permission to access this page.')
@@ -61,43 +76,92 @@ def admin_claims(request):
 
     #Filtering options
     status_filter = request.GET.get('status', 'pending_approval')
-
-    # Get items pending approval
-    pending_approval_items = Item.objects.filter(status='reported').order_by('-created_at')
-
-    # Get claims based on filter
-    if status_filter == 'pending_approval':
-        claims = []  # No claims to show on this tab
-    elif status_filter == 'all':
-        # Show ALL claims that need attention (pending, approved, rejected)
-        claims = Claim.objects.filter(status__in=['pending', 'approved', 'rejected']).order_by('-created_at')
-    elif status_filter == 'completed':
-        claims = Claim.objects.filter(status='completed').order_by('-created_at')
-    else:
-        # For specific status filters (pending, approved, rejected)
-        claims = Claim.objects.filter(status=status_filter).order_by('-created_at')
-
-    # Calculate counts for each category
-    counts = {
-        'pending_approval': Item.objects.filter(status='reported').count(),
-        'pending': Claim.objects.filter(status='pending').count(),
-        'approved': Claim.objects.filter(status='approved').count(),
-        'rejected': Claim.objects.filter(status='rejected').count(),
-        'completed': Claim.objects.filter(status='completed').count(),
-        'all': Claim.objects.filter(status__in=['pending', 'approved', 'rejected']).count(),
-        'all_actionable': (
-            Item.objects.filter(status='reported').count() +
-            Claim.objects.filter(status__in=['pending', 'approved', 'rejected']).count()
-        )
-    }
+    if status_filter not in QUEUE_FILTERS:
+        status_filter = 'pending_approval'
+    sort = request.GET.get('sort', 'newest')
+
+    # The "All Pending" tab has two lists, `list` says which one a cursor belongs to
+    paging = request.GET.get('list', 'claims' if status_filter != 'pending_approval' else 'reports')
+    cursor = request.GET.get('cursor')
+    # "Load more" only needs the next rows of one list
+    partial = wants_partial(request)
+
+    # Items pending approval (this tab and "All Pending")
+    reports = None
+    if status_filter in ('pending_approval', 'all') and not (partial and paging != 'reports'):
+        params = request.GET.copy()
+        params['list'] = 'reports'
+        reports = paginate_keyset(report_queue(), cursor if paging == 'reports' else None,
+                                  per_page=REPORTS_PER_PAGE, params=params)
+
+    # Claims based on filter (no claims on the pending reports tab)
+    claims = None
+    if status_filter != 'pending_approval' and not (partial and paging != 'claims'):
+        queryset, ordering = claim_queue(status_filter, sort)
+        params = request.GET.copy()
+        params['list'] = 'claims'
+        claims = paginate_keyset(queryset, cursor if paging == 'claims' else None,
+                                 ordering=ordering, per_page=CLAIMS_PER_PAGE, params=params)
+
+    if partial:
+        if reports is not None:
+            return render(request, 'claims/_report_page.html', {'page': reports})
+        if claims is not None:
+            return render(request, 'claims/_claim_page.html', {'page': claims, 'selectable': status_filter != 'completed'})
 
     return render(request, 'claims/admin_claims.html', {
         'claims': claims,
         'current_filter': status_filter,
-        'pending_approval_items': pending_approval_items,
-        'counts': counts
+        'current_sort': sort,
+        'pending_approval_items': reports,
+        'counts': queue_counts(),
     })
 
+#Bulk actions on the ticked reports or claims of admin_claims
+@login_required
+@require_POST
+@query_budget(6)
+def bulk_action(request):
+    if not (request.user.is_staff or request.user.user_type == 'teacher'):
+        messages.error(request, 'You do not have permission to access this page.')
+        return redirect('home')
+
+    action = request.POST.get('action')
+    ids = bulk.selected_ids(request.POST.getlist('selected'))
+    notes = request.POST.get('notes', '')
+    discard_reason = request.POST.get('discard_reason') or 'Bulk discard by admin'
+    status_filter = request.POST.get('status')
+    back = redirect(f"{reverse('admin_claims')}?status={status_filter if status_filter in QUEUE_FILTERS else 'pending_approval'}")
+
+    if not ids:
+        messages.warning(request, 'Select at least one entry first.')
+        return back
+    if len(ids) > bulk.MAX_SELECTION:
+        messages.error(request, f'{len(ids)} entries selected, select at most {bulk.MAX_SELECTION} at a time. Nothing was changed.')
+        return back
+
+    if action == 'approve_reports':
+        done = bulk.approve_reports(ids, request.user, notes)
+        messages.success(request, f'{done} item(s) approved and now available for claims.')
+    elif action == 'discard_reports':
+        done = bulk.discard_items(ids, request.user, discard_reason, notes)
+        messages.success(request, f'{done} item(s) marked as discarded/donated.')
+    elif action == 'reject_claims':
+        done = bulk.reject_claims(ids, request.user, notes)
+        messages.success(request, f'{done} claim(s) rejected. Their items are available for new claims.')
+    elif action == 'discard_claimed_items':
+        done = bulk.discard_claimed_items(ids, request.user, discard_reason, notes)
+        messages.success(request, f'{done} item(s) marked as discarded/donated.')
+        # Several claims can be for the same item, so fewer items than claims isn't a skip
+        return back
+    else:
+        messages.error(request, 'Unknown action.')
+        return back
+
+    if done < len(ids):
+        messages.info(request, f'{len(ids) - done} of the selected entries had already been processed and were skipped.')
+    return back
+
 #Admin view to review claim detail
 @login_required
 def review_claim(request, claim_pk):
@@ -167,4 +231,12 @@ def review_claim(request, claim_pk):
 
         return redirect('admin_claims')
     
-    return render(request, 'claims/review_claim.html', {'claim': claim})
\ No newline at end of file
+    # Other claims on the same item, best match first, to compare against
+    competing_claims = claim.item.claims.exclude(pk=claim.pk).select_related('claimant').order_by(
+        F('match_score').desc(nulls_last=True), '-created_at'
+    )
+
+    return render(request, 'claims/review_claim.html', {
+        'claim': claim,
+        'competing_claims': competing_claims,
+    })
\ No newline at end of file
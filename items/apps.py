@@ -1,6 +1,30 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class ItemsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'items'
+
+    def ready(self):
+        from . import facets, fragments, storage
+        from .fuzzy import item_deleted, item_saved
+        from .search import repair_sqlite_triggers
+        post_migrate.connect(repair_sqlite_triggers, sender=self)
+
+        # Keep this process's in-memory trigram index current (SQLite only)
+        Item = self.get_model('Item')
+        post_save.connect(item_saved, sender=Item)
+        post_delete.connect(item_deleted, sender=Item)
+
+        # Drop cached search facets when counts may have changed
+        post_save.connect(facets.item_saved, sender=Item)
+        post_delete.connect(facets.item_deleted, sender=Item)
+
+        # Re-render cached fragments that list items (see fragments.py)
+        post_save.connect(fragments.item_changed, sender=Item)
+        post_delete.connect(fragments.item_changed, sender=Item)
+
+        # Remove photos no item uses any more (see storage.py)
+        post_save.connect(storage.item_saved, sender=Item)
+        post_delete.connect(storage.item_deleted, sender=Item)
@@ -0,0 +1,102 @@
+"""
+Conditional GETs for the item pages: ETag and Last-Modified headers, and a
+304 Not Modified without rendering anything when the browser's copy is still
+current.
+
+Each page has a validator, one cheap query for when what it shows last
+changed:
+- item_detail: the item's updated_at, the names of the people it shows
+  (renaming a user doesn't touch the item) and the "reported ... ago" text,
+  which changes with time alone (primary key lookup, joined to the users)
+- my_items: the newest updated_at and the number of the user's items
+  (submitter index)
+- item_list: the newest updated_at of all items (one seek on the updated_at
+  index) and the item version (items/fragments.py), which deletes bump. An
+  item moving in or out of the list changes its updated_at, so the whole
+  table stands in safely for the filtered list; the newest updated_at of
+  just the matching rows would mean reading all of them.
+
+The ETag also covers who is looking (the nav and buttons depend on the user
+and their role), the CSRF cookie (so a reused page never has a stale form
+token) and whether the "load more" script asked. Pages with a flash message
+waiting are always rendered. Responses are private and no-cache: browsers
+check back every time and shared caches don't keep them.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.timesince import timesince
+
+from lostandfound.pagination import wants_partial
+
+from .fragments import item_version
+from .models import Item
+
+# What item_detail shows of the people involved
+PEOPLE_FIELDS = [
+    f'{relation}__{field}'
+    for relation in ('submitted_by', 'returned_to', 'discarded_by')
+    for field in ('username', 'first_name', 'last_name', 'email')
+]
+
+
+def viewer(request):
+    """What about the user changes how a page looks"""
+    user = request.user
+    role = 'admin' if user.is_staff else user.user_type
+    return (user.pk, role, user.first_name, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), wants_partial(request))
+
+
+def conditional_page(validator):
+    """
+    Answer GETs with 304 when `validator(request, *args, **kwargs)` gives the
+    same (last modified, *anything else) as when the browser got the page.
+    A validator returning None lets the view handle the request as usual.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+            validated = validator(request, *args, **kwargs)
+            if validated is None:
+                return view(request, *args, **kwargs)
+
+            last_modified = validated[0].timestamp() if validated[0] else None
+            parts = (request.get_full_path(), *validated, *viewer(request))
+            etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.headers['ETag'] = etag
+                if last_modified is not None:
+                    response.headers['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Cookie', 'X-Requested-With'))
+            return response
+        return wrapper
+    return decorator
+
+
+def item_validator(request, pk):
+    row = Item.objects.filter(pk=pk).values_list('updated_at', 'created_at', *PEOPLE_FIELDS).first()
+    if row is None:
+        return None
+    updated_at, created_at, *people = row
+    return (updated_at, timesince(created_at), *people)
+
+
+def my_items_validator(request):
+    mine = Item.objects.filter(submitted_by=request.user).aggregate(latest=Max('updated_at'), count=Count('id'))
+    return mine['latest'], mine['count']
+
+
+def item_list_validator(request):
+    return Item.objects.aggregate(latest=Max('updated_at'))['latest'], item_version()
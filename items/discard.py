@@ -0,0 +1,109 @@
+"""
+Automatic discarding of items nobody is coming back for.
+
+Two rules, both checked in the database:
+- unclaimed: items still unclaimed (or whose claim was rejected) this many
+  days after they were reported (90 by default)
+- not picked up: items whose claim was verified PICKUP_DAYS (60) days ago but
+  that were never marked as returned, the countdown shown on the claim pages
+
+Matching items are discarded in chunks, oldest first along the status/date
+indexes. Each chunk is selected and updated (one UPDATE by primary key) in its
+own transaction. On Postgres the selected rows are locked until the update,
+on SQLite the transaction keeps other writers out, and the UPDATE repeats the
+status and date conditions anyway, so an item claimed or approved in between
+is left alone. Memory use and lock time stay the same however many items
+match.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from claims.queues import clear_queue_counts
+
+from .facets import bump_facet_version
+from .fragments import bump_item_version
+from .models import Item
+
+UNCLAIMED_DAYS = 90
+
+# Same countdown as Item.days_until_discard
+PICKUP_DAYS = 60
+
+CHUNK_SIZE = 5000
+
+# Items in one of `statuses` whose `date_field` is before `cutoff` get discarded with `reason`
+DiscardRule = namedtuple('DiscardRule', ['name', 'statuses', 'date_field', 'cutoff', 'reason'])
+
+
+def discard_rules(now=None, unclaimed_days=UNCLAIMED_DAYS):
+    now = now or timezone.now()
+    return [
+        DiscardRule(
+            'unclaimed',
+            ['unclaimed', 'rejected'],
+            'created_at',
+            now - timedelta(days=unclaimed_days),
+            f'Auto-discarded: Unclaimed for {unclaimed_days}+ days',
+        ),
+        DiscardRule(
+            'not picked up',
+            ['verified'],
+            'verified_date',
+            now - timedelta(days=PICKUP_DAYS),
+            f'Auto-discarded: Not picked up within {PICKUP_DAYS} days of verification',
+        ),
+    ]
+
+
+def eligible_items(rule, status):
+    """Items in `status` that `rule` discards, oldest first"""
+    # One status at a time, so the (status, date) indexes return rows already in order
+    return Item.objects.filter(
+        status=status, **{f'{rule.date_field}__lte': rule.cutoff}
+    ).order_by(rule.date_field, 'id')
+
+
+def discard_in_chunks(rule, chunk_size=CHUNK_SIZE):
+    """
+    Discard every item matching `rule`, yielding the number discarded after
+    each chunk. Discarded rows no longer match, so every chunk simply takes
+    the first `chunk_size` rows that still do.
+    """
+    for status in rule.statuses:
+        while True:
+            with transaction.atomic():
+                chunk = eligible_items(rule, status)
+                if connection.vendor == 'postgresql':
+                    # Rows someone else is editing are left for the next run
+                    chunk = chunk.select_for_update(skip_locked=True)
+                ids = list(chunk.values_list('id', flat=True)[:chunk_size])
+                if not ids:
+                    break
+
+                now = timezone.now()
+                discarded = eligible_items(rule, status).filter(id__in=ids).update(
+                    status='discarded',
+                    discard_date=now,
+                    discard_reason=rule.reason,
+                    discarded_by=None,
+                    updated_at=now,
+                )
+
+            bump_facet_version()
+            bump_item_version()
+            clear_queue_counts()
+            yield discarded
+
+            if len(ids) < chunk_size:
+                break
+
+
+def auto_discard(unclaimed_days=UNCLAIMED_DAYS, chunk_size=CHUNK_SIZE):
+    """Apply every rule, returns {rule name: items discarded}"""
+    totals = {}
+    for rule in discard_rules(unclaimed_days=unclaimed_days):
+        totals[rule.name] = sum(discard_in_chunks(rule, chunk_size))
+    return totals
@@ -0,0 +1,133 @@
+"""
+Near-duplicate photo detection for item reports.
+
+Every photo gets a 64-bit difference hash (dHash): the image is shrunk to 9x8
+grey pixels and each bit says whether a pixel is brighter than its right-hand
+neighbour. Re-taken, re-cropped or re-compressed photos of the same object end
+up a few bits apart, so "near duplicate" means a small Hamming distance.
+
+To find those without comparing against every photo, the hash is also stored
+as four 16-bit bands in indexed columns (multi-index hashing). Two hashes at
+most MAX_DISTANCE bits apart must have at least one band that differs in at
+most MAX_DISTANCE // 4 bits, so the lookup asks the indexes for every band
+value within that radius and only checks the exact distance of those rows.
+"""
+from itertools import combinations
+
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Photos up to this many bits apart are reported as likely duplicates
+MAX_DISTANCE = 10
+
+# Upper bound on rows checked per lookup, only reached by near-blank photos
+MAX_CANDIDATES = 5000
+
+# Items that are gone don't need a second report merged into them
+ACTIVE_STATUSES = ['reported', 'unclaimed', 'claimed', 'rejected', 'verified']
+
+BAND_FIELDS = [f'photo_hash_{band}' for band in range(BANDS)]
+
+
+def dhash(photo):
+    """64-bit difference hash of an image file or file-like object"""
+    image = Image.open(photo)
+    # JPEGs can decode straight to a fraction of their size, we only need 9x8
+    image.draft('L', (64, 64))
+    image = ImageOps.exif_transpose(image).convert('L').resize((9, 8), Image.BOX)
+    pixels = image.tobytes()
+
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> the value stored in a (signed) BigIntegerField"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def hamming(first, second):
+    return (to_unsigned(first) ^ to_unsigned(second)).bit_count()
+
+
+def bands(value):
+    value = to_unsigned(value)
+    return [(value >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def band_neighbours(band_value, radius):
+    """Every 16-bit value at most `radius` bits away from `band_value`"""
+    values = [band_value]
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), distance):
+            flipped = band_value
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def set_photo_hash(item):
+    """Hash `item.photo` and fill in the hash columns, call before saving"""
+    default_photo = item._meta.get_field('photo').default
+    if not item.photo or item.photo.name == default_photo:
+        item.photo_hash = None
+        for field in BAND_FIELDS:
+            setattr(item, field, None)
+        return
+
+    photo = item.photo.file
+    photo.seek(0)
+    value = dhash(photo)
+    photo.seek(0)
+
+    item.photo_hash = to_signed(value)
+    for field, band_value in zip(BAND_FIELDS, bands(value)):
+        setattr(item, field, band_value)
+
+
+def find_duplicates(item, max_distance=MAX_DISTANCE, limit=6):
+    """
+    Active items whose photo is at most `max_distance` bits from `item`'s,
+    closest first. Each returned item has a `photo_distance` attribute.
+    """
+    from .models import Item
+
+    if item.photo_hash is None:
+        return []
+
+    radius = max_distance // BANDS
+    lookup = Q()
+    for field, band_value in zip(BAND_FIELDS, bands(item.photo_hash)):
+        lookup |= Q(**{f'{field}__in': band_neighbours(band_value, radius)})
+
+    # Only the band lookup goes to the database (so it always uses the band
+    # indexes), most candidates are discarded on their exact distance
+    candidates = Item.objects.filter(lookup).order_by().values_list('id', 'photo_hash', 'status')
+    distances = {}
+    for pk, photo_hash, status in candidates[:MAX_CANDIDATES]:
+        if pk == item.pk or status not in ACTIVE_STATUSES:
+            continue
+        distance = hamming(item.photo_hash, photo_hash)
+        if distance <= max_distance:
+            distances[pk] = distance
+
+    closest = sorted(distances, key=lambda pk: (distances[pk], -pk))[:limit]
+    duplicates = Item.objects.filter(pk__in=closest).for_cards().in_bulk()
+    for pk in closest:
+        duplicates[pk].photo_distance = distances[pk]
+    return [duplicates[pk] for pk in closest]
@@ -0,0 +1,107 @@
+"""
+Category and location counts ("facets") for the item search page.
+
+All counts for a search come from one GROUP BY query and are cached per
+normalized search text. Cache keys include a version number that is bumped
+whenever an item is created, deleted, or has its status, category or location
+changed, so stale counts are never served after an edit. Typo searches made
+before this worker's fuzzy index is built match differently, their counts are
+cached under separate keys.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .fragments import new_version
+from .fuzzy import fuzzy_index_ready
+
+FACET_CACHE_TIMEOUT = 60 * 10
+FACET_VERSION_KEY = 'item_facets:version'
+
+# Only the busiest locations are worth showing as quick filters
+MAX_LOCATIONS = 8
+
+# Fields whose change alters some facet count
+FACET_FIELDS = ('status', 'category', 'location_found')
+
+
+def normalize_query(query):
+    """'  AirPods   case ' and 'airpods case' share a cache entry"""
+    return ' '.join((query or '').lower().split())
+
+
+def facet_version():
+    version = cache.get(FACET_VERSION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(FACET_VERSION_KEY, version, timeout=None):
+            version = cache.get(FACET_VERSION_KEY, version)
+    return version
+
+
+def bump_facet_version():
+    """Invalidate every cached facet. Call after bulk .update() calls too."""
+    try:
+        cache.incr(FACET_VERSION_KEY)
+    except ValueError:
+        cache.set(FACET_VERSION_KEY, new_version(), timeout=None)
+
+
+def _cache_key(query):
+    query = normalize_query(query)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    index = 'scan:' if query and not fuzzy_index_ready() else ''
+    return f'item_facets:v{facet_version()}:{index}{digest}'
+
+
+def facet_counts(queryset, query=''):
+    """
+    Count the rows of `queryset` per category and per location.
+
+    `queryset` must be the available items already narrowed by `query` but not
+    by category, so every category shows how many results it would give. It
+    may also be a function returning that queryset, called only when the
+    counts aren't cached.
+    Returns {'categories': {value: count}, 'locations': [(location, count)], 'total': n}.
+    """
+    key = _cache_key(query)
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    if callable(queryset):
+        queryset = queryset()
+
+    categories = {}
+    locations = {}
+    total = 0
+    rows = queryset.order_by().values('category', 'location_found').annotate(count=Count('id'))
+    for row in rows:
+        count = row['count']
+        total += count
+        categories[row['category']] = categories.get(row['category'], 0) + count
+        locations[row['location_found']] = locations.get(row['location_found'], 0) + count
+
+    facets = {
+        'categories': categories,
+        'locations': sorted(locations.items(), key=lambda pair: (-pair[1], pair[0]))[:MAX_LOCATIONS],
+        'total': total,
+    }
+    cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
+
+
+def facet_values(item):
+    return tuple(item.__dict__.get(field) for field in FACET_FIELDS)
+
+
+def item_saved(sender, instance, created=False, **kwargs):
+    loaded = getattr(instance, '_loaded_facet_values', None)
+    if created or loaded is None or loaded != facet_values(instance):
+        bump_facet_version()
+    instance._loaded_facet_values = facet_values(instance)
+
+
+def item_deleted(sender, instance, **kwargs):
+    bump_facet_version()
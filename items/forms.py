@@ -1,7 +1,9 @@
 from django import forms
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from .models import Item
+from .uploads import prepare_photo
 
 class ItemForm(forms.ModelForm):
     class Meta:
@@ -80,5 +82,9 @@ class ItemForm(forms.ModelForm):
             
             if not any(file_name.endswith(ext) for ext in allowed_extensions):
                 raise ValidationError('Only JPG, PNG, GIF, and WEBP image files are allowed.')
+
+            # New uploads are decoded, checked and stored as a resized JPEG without metadata
+            if isinstance(photo, UploadedFile):
+                photo = prepare_photo(photo)
         
         return photo
\ No newline at end of file
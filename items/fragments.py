@@ -0,0 +1,46 @@
+"""
+Versions for the cached template fragments that show items.
+
+An item card is cached under its item's pk and updated_at, so it is rendered
+again as soon as the row changes. A list of items (the home slider) has no
+single row to key on and uses a global item version instead, bumped on every
+Item save and delete. Bulk .update() calls send no signals and must call
+bump_item_version() themselves (and set updated_at).
+
+The version is kept in the cache itself, so with a shared backend (file,
+the default, or memcached, see CACHES in settings.py) a save in one gunicorn
+worker invalidates the fragments of all of them. A missing version (evicted
+or never set) starts again from the clock in microseconds, so it never comes
+back to a number fragments are still cached under.
+"""
+import time
+
+from django.core.cache import cache
+
+ITEM_VERSION_KEY = 'items:version'
+
+
+def new_version():
+    """Starting value for a version counter kept in the cache, above any earlier one"""
+    return time.time_ns() // 1000
+
+
+def item_version():
+    version = cache.get(ITEM_VERSION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(ITEM_VERSION_KEY, version, timeout=None):
+            version = cache.get(ITEM_VERSION_KEY, version)
+    return version
+
+
+def bump_item_version():
+    """Invalidate every fragment keyed on the item version"""
+    try:
+        cache.incr(ITEM_VERSION_KEY)
+    except ValueError:
+        cache.set(ITEM_VERSION_KEY, new_version(), timeout=None)
+
+
+def item_changed(sender, **kwargs):
+    bump_item_version()
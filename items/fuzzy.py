@@ -0,0 +1,449 @@
+"""
+Typo-tolerant (trigram) search for items.
+
+Used when full-text search finds nothing, so "calculater", "airpods" or
+"air pod" still turn up the right item.
+
+Postgres uses pg_trgm word similarity backed by GIN trigram indexes on name,
+location_found and description (migration 0012).
+
+SQLite has no trigram support, so each process keeps a TrigramIndex in
+memory. Instead of comparing the query against every item, it compares each
+query word against the vocabulary of distinct words (a few hundred thousand
+at most, even with millions of items) and only then looks up which items use
+the close matches. The best MAX_WORD_CANDIDATES items per query word are
+scored (closest words first, then newest items), and the database is asked
+which of them pass the page's filters (status, category). The ranking is
+kept per query until the index changes, so "Load more" pages reuse it.
+
+The index is built in a background thread, started when the worker starts
+(see lostandfound/wsgi.py) or on the first search, and swapped in when done;
+until then a slower SQL scan over names and locations stands in. It is
+updated by post_save and post_delete signals in this process, catches up on
+edits made by other workers by reading rows whose updated_at moved since the
+last search, and every few minutes drops items other workers deleted, again
+in the background. Every indexing of an item is a new document and removing
+it only marks its document dead, so a bulk edit of thousands of rows costs no
+list scans, and dead documents are skipped with one array lookup. Rows whose
+text didn't change (status-only updates) are skipped by checksum. Once dead
+documents outnumber live ones the index is rebuilt.
+"""
+import json
+import re
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from datetime import timedelta
+
+from django.db import connection, connections
+from django.db.models import BooleanField, Case, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Left, Round
+from django.utils import timezone
+
+# Field weights, a close match on the name counts more than one in the description
+FIELD_WEIGHTS = {'name': 1.0, 'location_found': 0.8, 'description': 0.5}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+# Words whose trigram similarity to a query word is below this are ignored
+SIMILARITY_THRESHOLD = 0.3
+
+# Only the start of long descriptions is indexed in memory
+DESCRIPTION_PREFIX = 500
+
+# Most typo matches returned, after the queryset's own filters
+MAX_CANDIDATES = 500
+
+# Rows updated this long before a catch-up are read again by the next one, for late commits
+SYNC_OVERLAP = timedelta(seconds=10)
+
+# Edits by other workers are looked for at most this often (this worker's come through signals)
+CATCH_UP_SECONDS = 1
+
+# How often to look for items deleted by other workers
+DELETE_CHECK_SECONDS = 300
+
+# Items scored per query word, the best matches and newest items first
+MAX_WORD_CANDIDATES = 5000
+
+# Rankings kept for "Load more", per normalized query
+CACHED_QUERIES = 200
+
+# Rebuild from scratch once dead documents outnumber live ones (and there are this many)
+MIN_DEAD_DOCUMENTS = 50_000
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def words(text):
+    return [word for word in WORD_RE.findall((text or '').lower()) if len(word) > 1]
+
+
+def trigrams(word):
+    """Trigrams the way pg_trgm makes them: two spaces before, one after"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def query_words(query):
+    """
+    Words to look for. The query with its spaces removed is added too, which
+    is what lets "air pod" find "AirPods".
+    """
+    tokens = words(query)
+    if len(tokens) > 1:
+        tokens.append(''.join(tokens))
+    return tokens
+
+
+class IndexState:
+    """One generation of the trigram index, replaced as a whole when rebuilt"""
+
+    def __init__(self):
+        self.word_ids = {}
+        self.word_sizes = array('H')
+        self.gram_words = defaultdict(lambda: array('I'))
+        # Compact int arrays instead of sets: a million items fit in a few hundred MB.
+        # Each time an item is indexed it becomes a new document:
+        # postings[field][word_id] -> documents whose field has the word, oldest first,
+        # doc_items[document] -> its item id, 0 once the item is removed or indexed again,
+        # item_docs[item_id] -> (checksum of its text, its current document)
+        self.postings = [defaultdict(lambda: array('I')) for _ in FIELDS]
+        self.doc_items = array('I', [0])
+        self.item_docs = {}
+        self.dead = 0
+
+    def _word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is None:
+            word_id = len(self.word_sizes)
+            self.word_ids[word] = word_id
+            grams = trigrams(word)
+            self.word_sizes.append(min(len(grams), 65535))
+            for gram in grams:
+                self.gram_words[gram].append(word_id)
+        return word_id
+
+    def add(self, item_id, name, location_found, description):
+        """Index an item, returns False if its text hasn't changed"""
+        checksum = zlib.crc32('\0'.join((name or '', location_found or '', description or '')).encode())
+        current = self.item_docs.get(item_id)
+        if current is not None and current[0] == checksum:
+            return False
+        self.remove(item_id)
+        document = len(self.doc_items)
+        self.doc_items.append(item_id)
+        for field_number, text in enumerate((name, location_found, description)):
+            for word in set(words(text)):
+                self.postings[field_number][self._word_id(word)].append(document)
+        self.item_docs[item_id] = (checksum, document)
+        return True
+
+    def remove(self, item_id):
+        """Forget an item. Its document stays in the posting lists, marked dead."""
+        current = self.item_docs.pop(item_id, None)
+        if current is None:
+            return False
+        self.doc_items[current[1]] = 0
+        self.dead += 1
+        return True
+
+    def live_items(self, field_number, word_id):
+        """Items whose `field_number` contains the word, newest first"""
+        documents = self.postings[field_number].get(word_id)
+        if documents:
+            doc_items = self.doc_items
+            for document in reversed(documents):
+                item_id = doc_items[document]
+                if item_id:
+                    yield item_id
+
+    def similar_words(self, word):
+        """(word_id, similarity) for vocabulary words close to `word`"""
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            word_ids = self.gram_words.get(gram)
+            if word_ids:
+                shared.update(word_ids)
+        size = len(grams)
+        for word_id, common in shared.items():
+            similarity = common / (size + self.word_sizes[word_id] - common)
+            if similarity >= SIMILARITY_THRESHOLD:
+                yield word_id, similarity
+
+    def matches(self, word):
+        """{item_id: score} for the best MAX_WORD_CANDIDATES items matching `word`"""
+        best = {}
+        postings = sorted(
+            ((similarity * FIELD_WEIGHTS[field], field_number, word_id)
+             for word_id, similarity in self.similar_words(word)
+             for field_number, field in enumerate(FIELDS)),
+            reverse=True,
+        )
+        # Best scoring words first, so an item keeps the first score it gets
+        for score, field_number, word_id in postings:
+            for item_id in self.live_items(field_number, word_id):
+                if item_id not in best:
+                    best[item_id] = score
+                    if len(best) == MAX_WORD_CANDIDATES:
+                        return best
+        return best
+
+    def needs_rebuild(self):
+        return self.dead > max(len(self.item_docs), MIN_DEAD_DOCUMENTS)
+
+
+class TrigramIndex:
+    """In-memory trigram index over item words (used on SQLite)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        # Bumped on every change, cached results of an older one are recomputed
+        self.generation = 0
+        self.builds = 0
+        self.results = OrderedDict()
+        self.synced_at = None
+        self.caught_up_at = 0.0
+        self.deletes_checked_at = 0.0
+        self.worker = None
+
+    def in_background(self, task):
+        """Run `task` in a background thread, unless one is still running"""
+        with self.lock:
+            if self.worker is not None and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(target=self._run, args=(task,), name='trigram-index', daemon=True)
+            self.worker.start()
+
+    @staticmethod
+    def _run(task):
+        try:
+            task()
+        finally:
+            # Database connections are per thread, close this one's
+            connections.close_all()
+
+    def _rows(self, queryset):
+        return queryset.annotate(
+            description_head=Left('description', DESCRIPTION_PREFIX)
+        ).values_list('id', 'name', 'location_found', 'description_head').iterator(chunk_size=2000)
+
+    def _changed(self):
+        # Call with the lock held
+        self.generation += 1
+        self.results.clear()
+
+    def build(self):
+        """Index every item into a fresh state and swap it in. Slow, runs in the background."""
+        from .models import Item
+
+        started = timezone.now()
+        state = IndexState()
+        for row in self._rows(Item.objects.order_by()):
+            state.add(*row)
+        with self.lock:
+            self.state = state
+            self.builds += 1
+            self._changed()
+            # Edits made while building are read again by the next catch-up
+            self.synced_at = started - SYNC_OVERLAP
+            self.deletes_checked_at = time.monotonic()
+
+    def catch_up(self):
+        """Re-index rows edited by other workers since the last look"""
+        from .models import Item
+
+        started = timezone.now()
+        rows = list(self._rows(Item.objects.filter(updated_at__gt=self.synced_at).order_by()))
+        with self.lock:
+            changed = [self.state.add(*row) for row in rows]
+            if any(changed):
+                self._changed()
+            self.synced_at = max(self.synced_at, started - SYNC_OVERLAP)
+            self.caught_up_at = time.monotonic()
+
+    def forget_deleted(self):
+        """Drop items deleted by other workers. Runs in the background."""
+        from .models import Item
+
+        existing = set(Item.objects.values_list('id', flat=True).iterator(chunk_size=10000))
+        newest = max(existing, default=0)
+        with self.lock:
+            # Items created since the query have higher ids and stay
+            gone = [item_id for item_id in self.state.item_docs if item_id <= newest and item_id not in existing]
+            for item_id in gone:
+                self.state.remove(item_id)
+            if gone:
+                self._changed()
+            self.deletes_checked_at = time.monotonic()
+
+    def warm(self):
+        """Start building the index if it isn't there yet"""
+        if self.state is None:
+            self.in_background(self.build)
+
+    @property
+    def ready(self):
+        return self.state is not None
+
+    def update_item(self, item):
+        with self.lock:
+            if self.state is not None and self.state.add(
+                item.pk, item.name, item.location_found, (item.description or '')[:DESCRIPTION_PREFIX]
+            ):
+                self._changed()
+
+    def remove_item(self, item_id):
+        with self.lock:
+            if self.state is not None and self.state.remove(item_id):
+                self._changed()
+
+    def search(self, query):
+        """
+        Return [(item_id, score)], best first, with at most MAX_WORD_CANDIDATES
+        items per query word. None while the index is being built.
+        """
+        if self.state is None:
+            self.warm()
+            return None
+        if time.monotonic() - self.caught_up_at > CATCH_UP_SECONDS:
+            self.catch_up()
+        if self.state.needs_rebuild():
+            self.in_background(self.build)
+        elif time.monotonic() - self.deletes_checked_at > DELETE_CHECK_SECONDS:
+            self.in_background(self.forget_deleted)
+
+        key = ' '.join(query_words(query))
+        with self.lock:
+            # "Load more" asks again for the same query, reuse the ranking until something changes
+            ranked = self.results.get(key)
+            if ranked is not None:
+                self.results.move_to_end(key)
+                return ranked
+
+            scores = Counter()
+            for word in query_words(query):
+                # Each query word adds its best match, so items matching more words rank higher
+                scores.update(self.state.matches(word))
+            ranked = sorted(scores.items(), key=lambda pair: (pair[1], pair[0]), reverse=True)
+
+            self.results[key] = ranked
+            if len(self.results) > CACHED_QUERIES:
+                self.results.popitem(last=False)
+        return ranked
+
+
+trigram_index = TrigramIndex()
+
+
+def warm_trigram_index():
+    if connection.vendor == 'sqlite':
+        trigram_index.warm()
+
+
+def fuzzy_index_ready():
+    """False while typo search falls back to the SQL scan, whose results differ"""
+    return connection.vendor != 'sqlite' or trigram_index.ready
+
+
+def item_saved(sender, instance, **kwargs):
+    if connection.vendor == 'sqlite':
+        trigram_index.update_item(instance)
+
+
+def item_deleted(sender, instance, **kwargs):
+    if connection.vendor == 'sqlite':
+        trigram_index.remove_item(instance.pk)
+
+
+def _postgres_fuzzy(queryset, query):
+    terms = [' '.join(words(query))]
+    squashed = ''.join(words(query))
+    if squashed != terms[0]:
+        terms.append(squashed)
+
+    # "query <% column" is pg_trgm word similarity and can use the gin_trgm_ops indexes
+    match_sql = ' OR '.join(
+        f'%s <%% items_item.{field}' for _ in terms for field in FIELD_WEIGHTS
+    )
+    match_params = [term for term in terms for _ in FIELD_WEIGHTS]
+
+    rank_sql = 'GREATEST({})'.format(', '.join(
+        f'word_similarity(%s, items_item.{field}) * {weight}'
+        for _ in terms for field, weight in FIELD_WEIGHTS.items()
+    ))
+    return queryset.filter(
+        RawSQL(f'({match_sql})', match_params, output_field=BooleanField())
+    ).annotate(
+        # Rounded so the value survives a pagination cursor unchanged
+        search_rank=RawSQL(f'round(({rank_sql})::numeric, 6)::float8', match_params, output_field=FloatField())
+    )
+
+
+def _sqlite_scan_fuzzy(queryset, query):
+    """
+    Stand-in while the in-memory index is being built: reads every row and
+    keeps those whose name or location has at least half of each query
+    word's trigrams. Slower, and blind to descriptions, but never empty-handed.
+    """
+    ranks = []
+    for number, word in enumerate(words(query)):
+        grams = sorted({word[i:i + 3] for i in range(max(len(word) - 2, 1))})
+        hits = sum((
+            Case(When(Q(name__icontains=gram) | Q(location_found__icontains=gram), then=Value(1.0)), default=Value(0.0))
+            for gram in grams
+        ), Value(0.0))
+        queryset = queryset.alias(**{f'fuzzy_hits_{number}': hits}).filter(**{f'fuzzy_hits_{number}__gte': len(grams) / 2})
+        ranks.append(F(f'fuzzy_hits_{number}') / len(grams))
+    if not ranks:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return queryset.annotate(
+        search_rank=Round(sum(ranks, Value(0.0)) / len(ranks), 6, output_field=FloatField())
+    )
+
+
+def _sqlite_fuzzy(queryset, query):
+    ranked = trigram_index.search(query)
+    if ranked is None:
+        return _sqlite_scan_fuzzy(queryset, query)
+
+    matches = []
+    if ranked:
+        # One query asks which matches the queryset's own filters let through, the
+        # ids go in as a single JSON parameter so any number of them fit
+        ids = json.dumps([item_id for item_id, _ in ranked])
+        passing = set(queryset.filter(
+            id__in=RawSQL('SELECT value FROM json_each(%s)', [ids])
+        ).values_list('id', flat=True))
+        matches = [pair for pair in ranked if pair[0] in passing][:MAX_CANDIDATES]
+
+    if not matches:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    # One WHEN per distinct score rather than per item: the keyset cursor
+    # evaluates the rank several times per row
+    by_score = defaultdict(list)
+    for item_id, score in matches:
+        by_score[round(score, 6)].append(item_id)
+    return queryset.filter(id__in=[item_id for item_id, _ in matches]).annotate(
+        search_rank=Case(
+            *[When(id__in=item_ids, then=Value(score)) for score, item_ids in by_score.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def fuzzy_search_items(queryset, query):
+    """
+    Like search.search_items() but typo tolerant. Rows get a `search_rank`
+    annotation (higher is better), ordering is left to the caller.
+    """
+    if not words(query):
+        return queryset
+    if connection.vendor == 'postgresql':
+        return _postgres_fuzzy(queryset, query)
+    return _sqlite_fuzzy(queryset, query)
@@ -0,0 +1,104 @@
+"""
+Resized copies ("derivatives") of item photos.
+
+Every uploaded photo gets a thumbnail, a card and a detail size, each in WebP
+and JPEG. Templates point at these through the {% item_photo %} tag instead of
+the original upload, which can be several megabytes.
+
+The work is queued as a background task (see tasks/queue.py) and done by
+`manage.py run_worker`, or by a thread of the web process when there is no
+worker, so the request that saved the photo never waits for Pillow.
+"""
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from tasks.queue import task
+
+from .fragments import bump_item_version
+
+# Longest side in pixels for each size
+DERIVATIVE_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 1200,
+}
+
+# Pillow format name and save options for each file type
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DERIVATIVE_ROOT = 'derived'
+
+def derivative_name(photo_name, size, extension):
+    """items/abc.jpg -> derived/items/abc-card.webp"""
+    stem = os.path.splitext(photo_name)[0]
+    return f'{DERIVATIVE_ROOT}/{stem}-{size}.{extension}'
+
+
+def _encode(image, extension):
+    file_format, options = DERIVATIVE_FORMATS[extension]
+    buffer = io.BytesIO()
+    image.save(buffer, file_format, **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(photo_name):
+    """
+    Write every size/format of `photo_name` to storage and return a dict
+    describing them, e.g. {'card': {'width': 480, 'height': 360,
+    'webp': 'derived/...-card.webp', 'jpeg': 'derived/...-card.jpeg'}}.
+    Files that already exist (photos shared by several items) are reused.
+    """
+    derivatives = {}
+    with default_storage.open(photo_name, 'rb') as photo:
+        image = Image.open(photo)
+        # Let the JPEG decoder skip detail we are about to throw away
+        largest = max(DERIVATIVE_SIZES.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    # Largest first, each size is resized from the previous one
+    for size, longest_side in sorted(DERIVATIVE_SIZES.items(), key=lambda pair: -pair[1]):
+        image.thumbnail((longest_side, longest_side), Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for extension in DERIVATIVE_FORMATS:
+            name = derivative_name(photo_name, size, extension)
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(_encode(image, extension)))
+            entry[extension] = name
+        derivatives[size] = entry
+
+    return derivatives
+
+
+@task
+def generate_item_derivatives(item_id):
+    """Build derivatives for one item and record them on the row"""
+    from .models import Item
+
+    item = Item.objects.filter(pk=item_id).only('id', 'photo').first()
+    if item is None or not item.photo:
+        return None
+
+    derivatives = build_derivatives(item.photo.name)
+
+    # Skip the write if the photo was replaced while we were working
+    updated = Item.objects.filter(pk=item_id, photo=item.photo.name).update(
+        photo_derivatives=derivatives,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        bump_item_version()
+    return derivatives
+
+
+def schedule_derivatives(item):
+    """Queue building the derivatives of `item`"""
+    generate_item_derivatives.enqueue(item.pk)
@@ -1,10 +1,12 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from items.models import Item
+from items.discard import CHUNK_SIZE, PICKUP_DAYS, discard_in_chunks, discard_rules, eligible_items
 
 
 class Command(BaseCommand):
-    help = 'Automatically discard items that have been unclaimed for a specified number of days'
+    help = (
+        'Automatically discard items that have been unclaimed for a specified number of days, '
+        f'and verified items not picked up within {PICKUP_DAYS} days'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -18,52 +20,47 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be discarded without actually discarding',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Number of items discarded per database update (default: {CHUNK_SIZE})',
+        )
 
     def handle(self, *args, **options):
         threshold_days = options['days']
         dry_run = options['dry_run']
+        chunk_size = options['chunk_size']
 
-        # Find items eligible for auto-discard
-        eligible_items = Item.objects.filter(
-            status__in=['unclaimed', 'rejected']
-        )
-
-        items_to_discard = [
-            item for item in eligible_items
-            if item.is_eligible_for_auto_discard(threshold_days)
-        ]
+        total = 0
+        for rule in discard_rules(unclaimed_days=threshold_days):
+            if dry_run:
+                total += self.list_eligible(rule, chunk_size)
+                continue
 
-        if not items_to_discard:
-            self.stdout.write(
-                self.style.SUCCESS(f'No items found that are unclaimed for {threshold_days}+ days.')
-            )
-            return
-
-        self.stdout.write(
-            self.style.WARNING(f'Found {len(items_to_discard)} items eligible for auto-discard:')
-        )
-
-        for item in items_to_discard:
-            days_old = item.days_since_reported()
-            self.stdout.write(
-                f'  - {item.name} (ID: {item.pk}) - {days_old} days old - Status: {item.status}'
-            )
+            # Discard in chunks, one UPDATE per chunk (see items/discard.py)
+            discarded = sum(discard_in_chunks(rule, chunk_size))
+            if discarded:
+                self.stdout.write(self.style.SUCCESS(f'✓ Discarded {discarded} items: {rule.reason}'))
+            total += discarded
 
         if dry_run:
-            self.stdout.write(
-                self.style.WARNING('\n[DRY RUN] No items were actually discarded.')
-            )
-            return
+            self.stdout.write(self.style.WARNING(f'\n[DRY RUN] {total} items would be discarded. No items were actually discarded.'))
+        elif total:
+            self.stdout.write(self.style.SUCCESS(f'\nSuccessfully auto-discarded {total} items.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'No items found that are unclaimed for {threshold_days}+ days or verified {PICKUP_DAYS}+ days ago.'
+            ))
 
-        # Perform the discard
-        discard_count = 0
-        for item in items_to_discard:
-            item.status = 'discarded'
-            item.discard_date = timezone.now()
-            item.discard_reason = f'Auto-discarded: Unclaimed for {threshold_days}+ days'
-            item.save()
-            discard_count += 1
-
-        self.stdout.write(
-            self.style.SUCCESS(f'\nSuccessfully auto-discarded {discard_count} items.')
-        )
+    def list_eligible(self, rule, chunk_size):
+        """Print the items `rule` would discard as they are read, returns how many"""
+        count = 0
+        for status in rule.statuses:
+            rows = eligible_items(rule, status).values_list('id', 'name', rule.date_field)
+            for item_id, name, since in rows.iterator(chunk_size=chunk_size):
+                if count == 0:
+                    self.stdout.write(self.style.WARNING(f'Items eligible for auto-discard ({rule.reason}):'))
+                count += 1
+                self.stdout.write(f'  - {name} (ID: {item_id}) - since {since:%Y-%m-%d} - Status: {status}')
+        return count
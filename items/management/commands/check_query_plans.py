@@ -0,0 +1,129 @@
+"""
+Management command to catch missing indexes before they reach production
+Usage: python manage.py check_query_plans [--verbose]
+
+Runs EXPLAIN on the queries behind the busiest pages and fails if any of them
+would read a large table row by row (a sequential scan). On Postgres the
+planner is told to avoid sequential scans wherever it can, so a tiny
+development database still shows which plan would be used on a big one.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from accounts.models import StudentProfile
+from claims.models import Claim
+from claims.queues import claim_queue, report_queue
+from items.models import Item
+from lostandfound.pagination import keyset_filter
+
+User = get_user_model()
+
+# Tables that grow with usage, a full scan on any of these is a failure
+LARGE_TABLES = {
+    'items_item',
+    'claims_claim',
+    'accounts_customuser',
+    'accounts_studentprofile',
+}
+
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(.*)')
+
+
+def canonical_queries():
+    """The queries behind home, item_list, my_items, approve_item, admin_claims, submit_claim,
+    registration and auto_discard_items"""
+    available = Item.objects.filter(status__in=['unclaimed', 'rejected'])
+    cursor_values = ['2025-01-01T00:00:00+00:00', 1]
+    return [
+        ('home slider', available.for_cards().order_by('-created_at')[:8]),
+        ('item_list first page', available.for_cards().order_by('-created_at', '-id')[:25]),
+        ('item_list next page', available.for_cards().filter(
+            keyset_filter(('-created_at', '-id'), cursor_values)
+        ).order_by('-created_at', '-id')[:25]),
+        ('item_list category', available.filter(category='electronics').order_by('-created_at', '-id')[:25]),
+        ('my_items', Item.objects.filter(submitted_by_id=1).order_by('-created_at', '-id')[:25]),
+        ('duplicate photo lookup', Item.objects.filter(
+            Q(photo_hash_0__in=[1, 2]) | Q(photo_hash_1__in=[1, 2]) | Q(photo_hash_2__in=[1, 2]) | Q(photo_hash_3__in=[1, 2])
+        ).order_by().values_list('id', 'photo_hash', 'status')[:5000]),
+        ('admin_claims counts', Claim.objects.order_by().values('status').annotate(count=Count('id')).union(
+            Item.objects.filter(status='reported').order_by().values('status').annotate(count=Count('id')), all=True
+        )),
+        ('admin_claims pending reports', report_queue().filter(
+            keyset_filter(('-created_at', '-id'), cursor_values)
+        ).order_by('-created_at', '-id')[:21]),
+        ('admin_claims claims by status', claim_queue('pending')[0].filter(
+            keyset_filter(('-created_at', '-id'), cursor_values)
+        ).order_by('-created_at', '-id')[:21]),
+        ('admin_claims actionable claims', claim_queue('all')[0].filter(
+            keyset_filter(('-created_at', '-id'), cursor_values)
+        ).order_by('-created_at', '-id')[:21]),
+        ('submit_claim pending check', Claim.objects.filter(item_id=1, claimant_id=1, status='pending')[:1]),
+        ('my_claims', Claim.objects.filter(claimant_id=1).order_by('-created_at')),
+        ('auto_discard unclaimed', Item.objects.filter(
+            status='unclaimed', created_at__lte='2025-01-01T00:00:00+00:00'
+        ).order_by('created_at', 'id').values_list('id', flat=True)[:5000]),
+        ('auto_discard not picked up', Item.objects.filter(
+            status='verified', verified_date__lte='2025-01-01T00:00:00+00:00'
+        ).order_by('verified_date', 'id').values_list('id', flat=True)[:5000]),
+        ('registration email check', User.objects.filter(email='student@example.com')[:1]),
+        ('registration student ID check', StudentProfile.objects.filter(student_id='12345')[:1]),
+        ('pending_users', User.objects.filter(approval_status='pending').exclude(
+            user_type='admin'
+        ).order_by('-date_joined')[:25]),
+    ]
+
+
+def full_scans(plan):
+    """Names of large tables that `plan` reads without an index"""
+    if connection.vendor == 'postgresql':
+        tables = POSTGRES_SEQ_SCAN.findall(plan)
+    else:
+        # "SCAN items_item USING INDEX ..." walks an index, plain "SCAN items_item" does not
+        tables = [table for table, rest in SQLITE_SCAN.findall(plan) if 'USING' not in rest]
+    return sorted({table for table in tables if table in LARGE_TABLES})
+
+
+def explain(queryset):
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+class Command(BaseCommand):
+    help = 'Fails if a hot query plans a sequential scan on a large table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Print every query plan, not only the failing ones',
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+
+        for name, queryset in canonical_queries():
+            plan = explain(queryset)
+            scanned = full_scans(plan)
+
+            if scanned:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'  ✗ {name}: sequential scan on {", ".join(scanned)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {name}'))
+
+            if scanned or options['verbose']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'      {line}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) use a sequential scan: {", ".join(failures)}')
+
+        self.stdout.write(self.style.SUCCESS('\nAll query plans use indexes.'))
@@ -0,0 +1,50 @@
+"""
+Management command to compare two run_benchmark result files
+Usage: python manage.py compare_benchmarks BEFORE.json AFTER.json [--tolerance 0.15]
+
+Prints p50/p99 latency and throughput per page side by side and fails if a
+page got slower (or its throughput fell) by more than the tolerance.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from lostandfound.benchmark import BenchmarkError, compare, load_results
+
+
+class Command(BaseCommand):
+    help = 'Compares two benchmark results and fails on regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('before', help='Results of the earlier run (e.g. the main branch)')
+        parser.add_argument('after', help='Results of the run to check')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.15,
+            help='Allowed change per page as a fraction (default: 0.15)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            before = load_results(options['before'])
+            after = load_results(options['after'])
+        except (OSError, ValueError, BenchmarkError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{before.get("commit") or options["before"]} → {after.get("commit") or options["after"]}')
+        if before['dataset'] != after['dataset'] or before['load']['concurrency'] != after['load']['concurrency']:
+            self.stdout.write(self.style.WARNING('The runs used different datasets or concurrency, changes may not mean much.'))
+
+        rows = compare(before, after, options['tolerance'])
+        regressions = 0
+        for row in rows:
+            change = f'{row.change:+.0%}' if row.change is not None else ''
+            line = f'  {row.page:<20} {row.metric:<7} {row.before:>9} → {row.after:<9} {change}'
+            if row.regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f'✗{line}'))
+            else:
+                self.stdout.write(f' {line}')
+
+        if regressions:
+            raise CommandError(f'{regressions} regression(s) beyond {options["tolerance"]:.0%}')
+        self.stdout.write(self.style.SUCCESS(f'\n✓ No regressions beyond {options["tolerance"]:.0%}'))
@@ -0,0 +1,37 @@
+"""
+Management command to build resized photo copies for existing items
+Usage: python manage.py generate_photo_derivatives [--all]
+"""
+from django.core.management.base import BaseCommand
+from items.images import generate_item_derivatives
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Builds thumbnail, card and detail WebP/JPEG copies of item photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild every item, not only the ones without derivatives',
+        )
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(photo='').exclude(photo__isnull=True)
+        if not options['all']:
+            items = items.filter(photo_derivatives={})
+
+        built = 0
+        failed = 0
+        for item_id in items.values_list('id', flat=True).iterator():
+            try:
+                generate_item_derivatives(item_id)
+                built += 1
+            except Exception as error:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ Item {item_id}: {error}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Built derivatives for {built} items.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} items could not be processed.'))
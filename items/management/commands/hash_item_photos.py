@@ -0,0 +1,50 @@
+"""
+Management command to compute perceptual photo hashes for existing items
+Usage: python manage.py hash_item_photos [--all]
+"""
+from django.core.management.base import BaseCommand
+from items.duplicates import BAND_FIELDS, set_photo_hash
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Computes the photo hashes used to spot duplicate item reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rehash every item, not only the ones without a hash',
+        )
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(photo='').only('id', 'photo', 'photo_hash', *BAND_FIELDS)
+        if not options['all']:
+            items = items.filter(photo_hash__isnull=True)
+
+        hashed = 0
+        failed = 0
+        batch = []
+        for item in items.iterator(chunk_size=500):
+            try:
+                set_photo_hash(item)
+            except Exception as error:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ Item {item.pk}: {error}'))
+                continue
+            finally:
+                item.photo.close()
+
+            batch.append(item)
+            if len(batch) == 500:
+                Item.objects.bulk_update(batch, ['photo_hash', *BAND_FIELDS])
+                hashed += len(batch)
+                batch = []
+
+        if batch:
+            Item.objects.bulk_update(batch, ['photo_hash', *BAND_FIELDS])
+            hashed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} photos.'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} photos could not be read.'))
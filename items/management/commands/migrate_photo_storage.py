@@ -0,0 +1,105 @@
+"""
+Management command to move item photos into content-addressed storage
+Usage: python manage.py migrate_photo_storage
+
+Photos saved under their upload names (items/IMG_1234.jpg) are renamed after
+their content hash (items/3f/a2/3fa2...c9.jpg, see items/storage.py). Copies
+of the same picture collapse into one file, their resized copies are moved
+along and every item is pointed at the new name. Safe to run again, photos
+that already have hashed names are skipped.
+"""
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from items.fragments import bump_item_version
+from items.images import DERIVATIVE_FORMATS, derivative_name
+from items.models import Item
+from items.storage import DEFAULT_PHOTO, is_hashed, photo_storage
+
+
+def move_derivatives(derivatives, photo_name):
+    """
+    Rename the resized copies in `derivatives` after `photo_name` and return
+    the updated dict, or {} if some are missing (generate_photo_derivatives
+    builds them again).
+    """
+    moved = {}
+    for size, entry in derivatives.items():
+        entry = dict(entry)
+        for extension in DERIVATIVE_FORMATS:
+            source, target = entry.get(extension), derivative_name(photo_name, size, extension)
+            if default_storage.exists(target):
+                # Another copy of the same picture got there first
+                if source and source != target:
+                    default_storage.delete(source)
+            elif source and default_storage.exists(source):
+                os.makedirs(os.path.dirname(default_storage.path(target)), exist_ok=True)
+                os.replace(default_storage.path(source), default_storage.path(target))
+            else:
+                return {}
+            entry[extension] = target
+        moved[size] = entry
+    return moved
+
+
+class Command(BaseCommand):
+    help = 'Renames item photos after their content hash, storing identical photos once'
+
+    def photo_names(self, batch_size=1000):
+        """Every photo name in use, read in batches since the rows change underneath"""
+        names = (
+            Item.objects.exclude(photo__in=['', DEFAULT_PHOTO])
+            .order_by('photo').values_list('photo', flat=True).distinct()
+        )
+        batch = list(names[:batch_size])
+        while batch:
+            yield from batch
+            batch = list(names.filter(photo__gt=batch[-1])[:batch_size])
+
+    def handle(self, *args, **options):
+        upload_to = Item._meta.get_field('photo').upload_to
+        photos = duplicates = items = missing = 0
+        freed = 0
+        for name in self.photo_names():
+            if is_hashed(name):
+                continue
+            if not photo_storage.exists(name):
+                missing += 1
+                self.stdout.write(self.style.ERROR(f'  ✗ {name}: file not found'))
+                continue
+
+            # Named by content under the upload directory, wherever it was before
+            upload_name = upload_to + os.path.basename(name)
+            with photo_storage.open(name, 'rb') as photo:
+                new_name = photo_storage.name_for(upload_name, photo)
+                if photo_storage.reuse(new_name):
+                    duplicates += 1
+                    freed += photo_storage.size(name)
+                else:
+                    new_name = photo_storage.save(upload_name, photo)
+
+            derivatives = (
+                Item.objects.filter(photo=name).exclude(photo_derivatives={})
+                .values_list('photo_derivatives', flat=True).first()
+            )
+            with transaction.atomic():
+                items += Item.objects.filter(photo=name).update(
+                    photo=new_name,
+                    photo_derivatives=move_derivatives(derivatives, new_name) if derivatives else {},
+                    updated_at=timezone.now(),
+                )
+            photo_storage.delete(name)
+            photos += 1
+
+        if photos:
+            bump_item_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Moved {photos} photos used by {items} items, '
+            f'{duplicates} were copies of another ({freed / 1024 / 1024:.1f} MB freed).'
+        ))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} photos were missing and left as they are.'))
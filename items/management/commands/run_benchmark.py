@@ -0,0 +1,157 @@
+"""
+Management command to load test the main pages against a generated dataset
+Usage: python manage.py run_benchmark [--items N] [--claims N] [--users N] [--seed N]
+       [--concurrency N] [--duration SECONDS] [--warmup SECONDS] [--workers N]
+       [--pages home,item_list,...] [--output FILE] [--compare FILE] [--tolerance 0.15]
+
+Builds a throwaway database, serves it with gunicorn and drives logged-in
+sessions through home, item_list (with and without a search), item_detail,
+admin_claims, submit_claim and report_item. Writes p50/p90/p99 latency and
+throughput per page as JSON. With --compare it fails when a page got slower
+than in an earlier result file (see lostandfound/benchmark.py).
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from lostandfound.benchmark import (
+    SCENARIOS, SESSIONS_PER_STAFF, BenchmarkError, HttpSession, build_dataset, compare, create_database,
+    destroy_database, free_port, load_results, results_document, run_session, sample_photos, start_server,
+    wait_for_server,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measures latency and throughput of the main pages under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000, help='Items in the generated dataset (default: 2000)')
+        parser.add_argument('--claims', type=int, default=1000, help='Claims in the generated dataset (default: 1000)')
+        parser.add_argument('--users', type=int, default=200, help='Users in the generated dataset (default: 200)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the dataset and the request mix (default: 1)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous sessions (default: 8)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds measured, after the warm-up (default: 30)')
+        parser.add_argument('--warmup', type=float, default=5, help='Seconds of load before measuring (default: 5)')
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes (default: 4)')
+        parser.add_argument(
+            '--pages',
+            default=','.join(SCENARIOS),
+            help=f'Comma separated pages to request (default: all of {", ".join(SCENARIOS)})',
+        )
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the results (default: benchmark.json)')
+        parser.add_argument('--compare', metavar='FILE', help='Earlier results to check this run against')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.15,
+            help='Allowed slowdown per page when comparing, as a fraction (default: 0.15)',
+        )
+
+    def handle(self, *args, **options):
+        pages = [page.strip() for page in options['pages'].split(',') if page.strip()]
+        unknown = sorted(set(pages) - set(SCENARIOS))
+        if unknown:
+            raise CommandError(f'Unknown page(s): {", ".join(unknown)}. Choose from {", ".join(SCENARIOS)}')
+        if options['users'] < 2 or options['items'] < 1:
+            raise CommandError('The dataset needs at least 2 users and 1 item')
+        baseline = load_results(options['compare']) if options['compare'] else None
+
+        with tempfile.TemporaryDirectory(prefix='lostandfound-benchmark-') as directory:
+            self.stdout.write('Creating the benchmark database...')
+            old_name, database_name = create_database(directory)
+            media_root = os.path.join(directory, 'media')
+            server = None
+            try:
+                started = time.monotonic()
+                with override_settings(MEDIA_ROOT=media_root):  # the seeded photo pool goes with the database
+                    dataset = build_dataset(options['items'], options['claims'], options['users'], options['seed'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'  ✓ {options["items"]} items, {options["claims"]} claims, {options["users"]} users '
+                    f'in {time.monotonic() - started:.1f}s'
+                ))
+
+                port = free_port()
+                server, description = start_server(database_name, media_root, port, options['workers'])
+                wait_for_server(server, port)
+                self.stdout.write(self.style.SUCCESS(f'  ✓ Server up ({description})'))
+
+                document = self.run_load(dataset, pages, port, description, options)
+            except BenchmarkError as error:
+                raise CommandError(str(error))
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait(timeout=30)
+                destroy_database(old_name)
+
+        with open(options['output'], 'w') as output:
+            json.dump(document, output, indent=2)
+
+        self.report(document)
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {options["output"]}'))
+
+        if baseline is not None:
+            self.check_regressions(baseline, document, options['tolerance'])
+
+    def run_load(self, dataset, pages, port, description, options):
+        concurrency = options['concurrency']
+        staff_sessions = max(1, concurrency // SESSIONS_PER_STAFF) if 'admin_claims' in pages else 0
+
+        self.stdout.write(f'Logging in {concurrency} sessions ({staff_sessions} staff)...')
+        rng = random.Random(options['seed'])
+        sessions = []
+        for number in range(concurrency):
+            staff = number < staff_sessions
+            session = HttpSession(port)
+            session.log_in(dataset.staff[number % len(dataset.staff)] if staff else rng.choice(dataset.students))
+            sessions.append((session, staff))
+
+        photos = sample_photos(rng)
+        self.stdout.write(f'Running for {options["warmup"]:g}s warm-up + {options["duration"]:g}s...')
+        now = time.monotonic()
+        warmup_until = now + options['warmup']
+        stop_at = warmup_until + options['duration']
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(run_session, session, staff, pages, dataset, photos,
+                                options['seed'] * 1000 + number, warmup_until, stop_at)
+                for number, (session, staff) in enumerate(sessions)
+            ]
+            samples = [sample for future in futures for sample in future.result()]
+
+        load = {
+            'concurrency': concurrency,
+            'staff_sessions': staff_sessions,
+            'duration': options['duration'],
+            'warmup': options['warmup'],
+            'pages': pages,
+        }
+        return results_document(dataset, load, description, samples, options['duration'])
+
+    def report(self, document):
+        self.stdout.write(f'\n{"Page":<20} {"Requests":>8} {"Errors":>6} {"Req/s":>8} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8}')
+        for page, stats in document['pages'].items():
+            line = (
+                f'{page:<20} {stats["requests"]:>8} {stats["errors"]:>6} {stats["rps"]:>8.1f} '
+                f'{stats["p50_ms"]:>8.1f} {stats["p90_ms"]:>8.1f} {stats["p99_ms"]:>8.1f}'
+            )
+            self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+        total = document['total']
+        self.stdout.write(f'\nTotal: {total["requests"]} requests, {total["errors"]} errors, {total["rps"]:.1f} req/s')
+
+    def check_regressions(self, baseline, document, tolerance):
+        regressions = [row for row in compare(baseline, document, tolerance) if row.regressed]
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'✓ No regressions against {baseline.get("commit") or "the baseline"}'))
+            return
+        for row in regressions:
+            change = f' ({row.change:+.0%})' if row.change is not None else ''
+            self.stdout.write(self.style.ERROR(f'  ✗ {row.page} {row.metric}: {row.before} → {row.after}{change}'))
+        raise CommandError(f'{len(regressions)} regression(s) against {baseline.get("commit") or "the baseline"}')
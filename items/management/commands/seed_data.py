@@ -1,13 +1,19 @@
 """
 Management command to seed the database with test data
 Usage: python manage.py seed_data
+       python manage.py seed_data --items 1000000 --claims 400000 --users 20000 [--seed 1] [--days 365]
+
+Without options it adds the test accounts and 10 sample items. With --items,
+--claims or --users it also generates that many rows with realistic,
+repeatable distributions (see lostandfound/seeding.py).
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 import random
 from items.models import Item
+from lostandfound import seeding
 
 User = get_user_model()
 
@@ -15,13 +21,30 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Seeds the database with test items in diverse categories and dates'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, help='Generate this many items')
+        parser.add_argument('--claims', type=int, help='Generate about this many claims (default: 40%% of --items)')
+        parser.add_argument('--users', type=int, help='Generate this many users (default: 2%% of --items, at least 10)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, the same seed gives the same data (default: 1)')
+        parser.add_argument('--days', type=int, default=365, help='Spread the generated items over this many days (default: 365)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=seeding.BATCH_SIZE,
+            help=f'Rows per bulk insert (default: {seeding.BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Starting database seeding...'))
 
         # Get or create test users
         admin_user = self.get_or_create_admin()
         test_users = self.get_or_create_test_users()
 
+        if any(options[name] is not None for name in ('items', 'claims', 'users')):
+            self.generate(options)
+            return
+
         # Clear existing test items (optional - comment out if you want to keep existing data)
         # Item.objects.all().delete()
         # self.stdout.write(self.style.WARNING('Cleared existing items'))
@@ -119,7 +142,15 @@ class Command(BaseCommand):
             # Random user who submitted
             submitted_by = random.choice(test_users)
             
-            # Create item
+            # Items past the reported stage come with their approval info
+            approval = {}
+            if item_data['status'] in ['unclaimed', 'verified', 'claimed', 'rejected']:
+                approval = {
+                    'approved_by': admin_user,
+                    'approval_date': timezone.now() - timedelta(days=days_ago-1),
+                    'approval_notes': 'Approved during seeding',
+                }
+
             item = Item.objects.create(
                 name=item_data['name'],
                 category=item_data['category'],
@@ -128,22 +159,46 @@ class Command(BaseCommand):
                 date_found=date_found,
                 status=item_data['status'],
                 submitted_by=submitted_by,
-                photo='items/default.jpg'  # Using default image
+                photo='items/default.jpg',  # Using default image
+                **approval
             )
             
-            # If item is approved status, set approval info
-            if item_data['status'] in ['unclaimed', 'verified', 'claimed', 'rejected']:
-                item.approved_by = admin_user
-                item.approval_date = timezone.now() - timedelta(days=days_ago-1)
-                item.approval_notes = 'Approved during seeding'
-                item.save()
-            
             created_count += 1
             self.stdout.write(self.style.SUCCESS(f'  ✓ Created: {item.name}'))
 
         self.stdout.write(self.style.SUCCESS(f'\nSuccessfully created {created_count} test items!'))
         self.stdout.write(self.style.SUCCESS('Database seeding complete!'))
 
+    def generate(self, options):
+        """Bulk generate items, claims and users"""
+        items = options['items'] or 0
+        claims = options['claims'] if options['claims'] is not None else items * 2 // 5
+        users = options['users'] if options['users'] is not None else max(10, items // 50)
+        if min(items, claims, users) < 0 or options['batch_size'] < 1:
+            raise CommandError('Counts must not be negative and --batch-size must be at least 1')
+
+        self.stdout.write(f'Generating {items} items, about {claims} claims and {users} users (seed {options["seed"]})...')
+        step = max(items // 20, options['batch_size'])
+
+        def progress(done):
+            if done % step < options['batch_size'] or done == items:
+                self.stdout.write(f'  {done}/{items} items')
+
+        try:
+            result = seeding.seed(
+                items, claims, users,
+                seed=options['seed'], days=options['days'], batch_size=options['batch_size'], progress=progress,
+            )
+        except seeding.SeedError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ Created {result.items} items, {result.claims} claims and {result.users} users '
+            f'in {result.seconds:.1f}s ({(result.items + result.claims + result.users) / max(result.seconds, 0.001):,.0f} rows/s)'
+        ))
+        self.stdout.write(f'  Generated users are seed{options["seed"]}_student<N> / seed{options["seed"]}_teacher<N>, '
+                          f'password: {seeding.PASSWORD}')
+
     def get_or_create_admin(self):
         """Get or create admin user for testing"""
         admin, created = User.objects.get_or_create(
@@ -0,0 +1,58 @@
+"""
+Who may download an item photo, for the media view (MEDIA_ACCESS_CHECK in
+settings, see lostandfound/media.py).
+
+A photo is visible when an item using it is:
+- available (unclaimed or rejected): to everyone, the home page slider shows
+  those to visitors
+- reported and not approved yet: to the person who reported it
+- anything else: to logged-in users, like the item page
+Staff see every photo an item uses. The default photo is public. Resized
+copies (derived/...) go with the photo they were made from. Anything else
+(released photos, half-written uploads, photos no item uses any more) is
+refused.
+"""
+from django.db.models import Q
+
+from .images import DERIVATIVE_FORMATS, DERIVATIVE_ROOT, DERIVATIVE_SIZES
+from .models import Item
+from .storage import DEFAULT_PHOTO
+
+PUBLIC_STATUSES = ('unclaimed', 'rejected')
+
+# Extensions a photo could have been uploaded with (see ItemForm.clean_photo)
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def photo_names(path):
+    """
+    Item.photo values `path` belongs to: itself, or the photo a resized copy
+    was made from. Empty for names items/images.py never writes.
+    """
+    prefix = f'{DERIVATIVE_ROOT}/'
+    if not path.startswith(prefix):
+        return [path]
+    # derived/items/abc-card.webp was made from items/abc.<some extension>
+    stem, _, suffix = path[len(prefix):].rpartition('-')
+    size, _, extension = suffix.partition('.')
+    if not stem or size not in DERIVATIVE_SIZES or extension not in DERIVATIVE_FORMATS:
+        return []
+    return [stem + extension for extension in PHOTO_EXTENSIONS + tuple(ext.upper() for ext in PHOTO_EXTENSIONS)]
+
+
+def can_view(request, path):
+    names = photo_names(path)
+    if not names:
+        return False
+    if DEFAULT_PHOTO in names:
+        return True
+
+    items = Item.objects.filter(photo__in=names)
+    user = request.user
+    if user.is_authenticated and (user.is_staff or user.user_type in ('teacher', 'admin')):
+        return items.exists()
+    if not user.is_authenticated:
+        visible = Q(status__in=PUBLIC_STATUSES)
+    else:
+        visible = ~Q(status='reported') | Q(submitted_by=user)
+    return items.filter(visible).exists()
@@ -0,0 +1,117 @@
+from django.db import migrations
+
+
+# Postgres: tsvector column + GIN index, kept up to date by a BEFORE trigger
+POSTGRES_FORWARD = [
+    "ALTER TABLE items_item ADD COLUMN search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION items_item_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.location_found, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER items_item_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, location_found ON items_item
+    FOR EACH ROW EXECUTE FUNCTION items_item_search_vector_update()
+    """,
+    # Fire the trigger once for every existing row to backfill the column
+    "UPDATE items_item SET name = name",
+    "CREATE INDEX items_item_search_vector_gin ON items_item USING gin (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS items_item_search_vector_trigger ON items_item",
+    "DROP FUNCTION IF EXISTS items_item_search_vector_update()",
+    "DROP INDEX IF EXISTS items_item_search_vector_gin",
+    "ALTER TABLE items_item DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite: row triggers keeping the FTS5 table in sync. Copied from
+# items.search.SQLITE_TRIGGERS so later edits there don't change this migration.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER items_item_fts_insert AFTER INSERT ON items_item BEGIN
+        INSERT INTO items_item_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_delete AFTER DELETE ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_update AFTER UPDATE OF name, description, location_found ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+        INSERT INTO items_item_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+]
+
+# SQLite: external-content FTS5 table, kept up to date by row triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE items_item_fts USING fts5(
+        name, description, location_found,
+        content='items_item', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    *SQLITE_TRIGGERS,
+    "INSERT INTO items_item_fts(items_item_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS items_item_fts_insert",
+    "DROP TRIGGER IF EXISTS items_item_fts_delete",
+    "DROP TRIGGER IF EXISTS items_item_fts_update",
+    "DROP TABLE IF EXISTS items_item_fts",
+]
+
+
+def sqlite_has_fts5(schema_editor):
+    """Some SQLite builds ship without FTS5, search then falls back to icontains"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+        run_statements(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run_statements(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        run_statements(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0010_item_verified_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, reverse_code=drop_search_index),
+    ]
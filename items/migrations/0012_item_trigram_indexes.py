@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# Postgres only: SQLite uses the in-memory index in items/fuzzy.py instead
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS items_item_name_trgm ON items_item USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS items_item_location_trgm ON items_item USING gin (location_found gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS items_item_description_trgm ON items_item USING gin (description gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS items_item_name_trgm",
+    "DROP INDEX IF EXISTS items_item_location_trgm",
+    "DROP INDEX IF EXISTS items_item_description_trgm",
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in POSTGRES_REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_item_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, reverse_code=drop_trigram_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0012_item_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status__in', ['unclaimed', 'rejected'])), fields=['-created_at', '-id'], name='item_available_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('status', 'reported')), fields=['-created_at'], name='item_reported_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['status', '-created_at'], name='item_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['submitted_by', '-created_at', '-id'], name='item_submitter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['updated_at'], name='item_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0013_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='photo_derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized WebP/JPEG copies of the photo, filled in by items/images.py'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0015_item_photo_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['status', 'verified_date'], name='item_status_verified_idx'),
+        ),
+    ]
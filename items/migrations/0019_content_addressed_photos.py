@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:50
+
+import items.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0018_item_photo_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='item',
+            name='photo',
+            field=models.ImageField(default='items/default.jpg', storage=items.storage.get_photo_storage, upload_to='items/'),
+        ),
+    ]
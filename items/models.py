@@ -1,6 +1,28 @@
 from django.db import models
+from django.db.models.functions import Left
 from accounts.models import CustomUser
 
+from .storage import DEFAULT_PHOTO, get_photo_storage, photo_name
+
+
+class ItemQuerySet(models.QuerySet):
+    # Columns the item card, slider and "load more" templates actually read
+    CARD_FIELDS = (
+        'id', 'name', 'category', 'location_found', 'date_found', 'photo', 'photo_derivatives', 'status',
+        'created_at', 'updated_at',
+    )
+
+    def for_cards(self, *extra_fields):
+        """
+        Load only what a card needs. The description is cut down in the
+        database (cards only show ~20 words of it) and the long notes fields
+        are never fetched.
+        """
+        return self.only(*self.CARD_FIELDS, *extra_fields).annotate(
+            description_preview=Left('description', 300)
+        )
+
+
 # Create your models here.
 class Item(models.Model):
     CATEGORY_CHOICES = (
@@ -33,7 +55,16 @@ class Item(models.Model):
     location_found = models.CharField(max_length=200)
     date_found = models.DateField()
 
-    photo = models.ImageField(upload_to='items/', default='items/default.jpg')
+    # Named by content hash and stored once however many items use it (see items/storage.py)
+    photo = models.ImageField(upload_to='items/', storage=get_photo_storage, default=DEFAULT_PHOTO)
+    photo_derivatives = models.JSONField(default=dict, blank=True, help_text="Resized WebP/JPEG copies of the photo, filled in by items/images.py")
+
+    # Perceptual hash of the photo and its four 16-bit bands, for finding duplicate reports (see items/duplicates.py)
+    photo_hash = models.BigIntegerField(null=True, blank=True, editable=False)
+    photo_hash_0 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    photo_hash_1 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    photo_hash_2 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
+    photo_hash_3 = models.IntegerField(null=True, blank=True, editable=False, db_index=True)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='reported')
 
@@ -57,12 +88,45 @@ class Item(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ItemQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at'] # Newest Items listed first
+        indexes = [
+            # Home slider and search page: available items, newest first
+            models.Index(
+                fields=['-created_at', '-id'], name='item_available_created_idx',
+                condition=models.Q(status__in=['unclaimed', 'rejected']),
+            ),
+            # Staff queue: items waiting for approval, newest first
+            models.Index(
+                fields=['-created_at', '-id'], name='item_reported_created_idx',
+                condition=models.Q(status='reported'),
+            ),
+            models.Index(fields=['status', '-created_at'], name='item_status_created_idx'),
+            # My Items page
+            models.Index(fields=['submitted_by', '-created_at', '-id'], name='item_submitter_created_idx'),
+            # "What changed since" lookups (trigram index catch-up)
+            models.Index(fields=['updated_at'], name='item_updated_idx'),
+            # Which item a photo belongs to, for access checks when serving it (see media.py)
+            models.Index(fields=['photo'], name='item_photo_idx'),
+            # Verified items waiting to be picked up, oldest countdown first (see items/discard.py)
+            models.Index(fields=['status', 'verified_date'], name='item_status_verified_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.location_found}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded facet fields so saving can tell whether they changed (see items/facets.py)
+        from .facets import facet_values
+        instance._loaded_facet_values = facet_values(instance)
+        # And the photo, so replacing it can release the old file (see items/storage.py)
+        instance._loaded_photo = photo_name(instance)
+        return instance
+
     def days_since_reported(self):
         """Calculate number of days since item was reported"""
         from django.utils import timezone
@@ -0,0 +1,169 @@
+"""
+Full-text search for items.
+
+Postgres keeps a `search_vector` tsvector column on items_item (GIN indexed),
+SQLite keeps an FTS5 shadow table called items_item_fts. Both are created by
+migration 0011 together with database triggers, so the index stays in sync
+whenever an Item is saved, edited, deleted or bulk written. SQLite drops
+triggers when it rebuilds a table, so repair_sqlite_triggers() runs after
+every migrate to put them back.
+
+Views should only call search_items() and never touch the backends directly.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .fuzzy import fuzzy_search_items
+
+FTS_TABLE = 'items_item_fts'
+
+# Column weights used for ranking: name matters most, then location, then description
+WEIGHTS = {'name': 10.0, 'description': 2.0, 'location_found': 5.0}
+
+# Row triggers that keep the SQLite FTS5 shadow table in sync with items_item
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER items_item_fts_insert AFTER INSERT ON items_item BEGIN
+        INSERT INTO items_item_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_delete AFTER DELETE ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+    END
+    """,
+    """
+    CREATE TRIGGER items_item_fts_update AFTER UPDATE OF name, description, location_found ON items_item BEGIN
+        INSERT INTO items_item_fts(items_item_fts, rowid, name, description, location_found)
+        VALUES ('delete', old.id, old.name, old.description, old.location_found);
+        INSERT INTO items_item_fts(rowid, name, description, location_found)
+        VALUES (new.id, new.name, new.description, new.location_found);
+    END
+    """,
+]
+
+# Sort order of search results, also used as the pagination key
+SEARCH_ORDERING = ('-search_rank', '-created_at', '-id')
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_fts5_ready = None
+
+
+def tokenize(query):
+    """Split a search box query into lowercase word tokens"""
+    return [token.lower() for token in TOKEN_RE.findall(query or '')]
+
+
+def sqlite_fts_available():
+    """Check (once per process) that the FTS5 shadow table exists"""
+    global _fts5_ready
+    if _fts5_ready is None:
+        with connection.cursor() as cursor:
+            _fts5_ready = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _fts5_ready
+
+
+def repair_sqlite_triggers(sender=None, using='default', **kwargs):
+    """
+    post_migrate hook: SQLite rebuilds items_item from scratch for most schema
+    changes, which silently drops the FTS triggers. Put them back and reindex.
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        if FTS_TABLE not in conn.introspection.table_names(cursor):
+            return
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'items_item_fts_%'"
+        )
+        if cursor.fetchone()[0] == len(SQLITE_TRIGGERS):
+            return
+        cursor.execute("DROP TRIGGER IF EXISTS items_item_fts_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS items_item_fts_delete")
+        cursor.execute("DROP TRIGGER IF EXISTS items_item_fts_update")
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _postgres_search(queryset, tokens):
+    # Prefix match every word: "calc grap" -> 'calc:* & grap:*'
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    return queryset.filter(
+        RawSQL(
+            "items_item.search_vector @@ to_tsquery('english', %s)",
+            [tsquery],
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        # ts_rank() is a float4, round it so it survives a trip through a
+        # pagination cursor and still compares equal afterwards
+        search_rank=RawSQL(
+            "round(ts_rank(items_item.search_vector, to_tsquery('english', %s))::numeric, 6)::float8",
+            [tsquery],
+            output_field=FloatField(),
+        )
+    )
+
+
+def _sqlite_search(queryset, tokens):
+    # Quote every word so FTS5 operators typed by users are treated as text
+    match = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+    weights = ', '.join(str(WEIGHTS[column]) for column in ('name', 'description', 'location_found'))
+    # Join the FTS table so MATCH runs once and drives the query, items are
+    # then looked up by primary key and bm25() is read from the same row.
+    # A correlated subquery per item would run the MATCH again for every hit.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = items_item.id'],
+        params=[match],
+    ).annotate(
+        # bm25() is "lower is better", flip it so higher ranks first on both engines
+        search_rank=RawSQL(f'-bm25({FTS_TABLE}, {weights})', [], output_field=FloatField())
+    )
+
+
+def _fallback_search(queryset, tokens):
+    # Used on databases without a search index, matches the old icontains behaviour
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(name__icontains=token) | Q(description__icontains=token) | Q(location_found__icontains=token)
+        )
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_items(queryset, query, fuzzy=True):
+    """
+    Filter an Item queryset down to rows matching `query`, best matches first.
+
+    Every returned row gets a `search_rank` annotation (higher is better).
+    When nothing matches exactly and `fuzzy` is on, falls back to the
+    typo-tolerant search in items/fuzzy.py. Apply other filters (status,
+    category) before calling this so the fallback decision sees them.
+    An empty query returns the queryset unchanged.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        results = _postgres_search(queryset, tokens)
+    elif connection.vendor == 'sqlite' and sqlite_fts_available():
+        results = _sqlite_search(queryset, tokens)
+    else:
+        results = _fallback_search(queryset, tokens)
+
+    # Nothing matched word for word, probably a typo: retry with trigram matching
+    if fuzzy and not results.exists():
+        results = fuzzy_search_items(queryset, query)
+
+    return results.order_by(*SEARCH_ORDERING)
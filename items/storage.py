@@ -0,0 +1,171 @@
+"""
+Content-addressed storage for item photos.
+
+A photo is named after the SHA-256 of its bytes and filed two directory
+levels deep by the first characters of that hash:
+
+    items/3f/a2/3fa2...c9.jpg
+
+so no directory holds more than a few dozen files even with millions of
+photos, and the same bytes (a picture reported twice, a photo re-uploaded
+while editing) are stored once. prepare_photo() re-encodes every upload, so
+the same picture gives the same bytes. Files are written under a temporary
+name and renamed into place, so a name never points at half a file.
+
+The references to a file are the items whose photo it is, counted through
+the item_photo_idx index rather than kept in a separate counter that bulk
+updates could get out of step with. When an item is deleted or its photo
+replaced, a release_photo task is queued to run RELEASE_DELAY later, which
+removes the file and its resized copies if no item uses it by then.
+DEFAULT_PHOTO is shared on purpose and never removed.
+
+Removal is delayed because an upload of the same bytes reuses the file
+before its item row is committed, so counting references can't see it yet.
+Reusing a file touches its modification time, and a file touched within
+RELEASE_DELAY is kept (and checked again later). The task moves the file
+aside before looking at that time, so an upload reusing it at that moment
+finds it gone and writes it again rather than pointing at a deleted file.
+
+`manage.py migrate_photo_storage` moves photos stored under their upload
+names into this layout.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+from tasks.queue import enqueue, task
+
+DEFAULT_PHOTO = 'items/default.jpg'
+
+# How long an unused photo is kept, longer than any upload takes to commit
+RELEASE_DELAY = timedelta(hours=1)
+
+HASHED_NAME = re.compile(r'^(?:.+/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(?:\.\w+)?$')
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME.match(name))
+
+
+def hashed_name(directory, digest, extension):
+    """items, 3fa2...c9, .jpg -> items/3f/a2/3fa2...c9.jpg"""
+    return posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Saves files under the hash of their content, see the module docstring"""
+
+    def name_for(self, name, content):
+        """The name `content` would be saved under, without saving it"""
+        digest = hashlib.sha256()
+        for chunk in File(content).chunks():
+            digest.update(chunk)
+        return hashed_name(posixpath.dirname(name), digest.hexdigest(), os.path.splitext(name)[1].lower())
+
+    def reuse(self, name):
+        """Mark an existing file as just used (see release_photo), False if there is none"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        directory = posixpath.dirname(name)
+        os.makedirs(self.path(directory), exist_ok=True)
+        # Hash while writing, so the upload is read only once
+        digest = hashlib.sha256()
+        handle, temporary = tempfile.mkstemp(dir=self.path(directory), prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+
+            name = hashed_name(directory, digest.hexdigest(), os.path.splitext(name)[1].lower())
+            if not self.reuse(name):
+                os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary, self.file_permissions_mode)
+                os.replace(temporary, self.path(name))
+            return name
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+
+photo_storage = ContentAddressedStorage()
+
+
+def get_photo_storage():
+    return photo_storage
+
+
+def release(name):
+    """Queue removing photo `name` once no item has used it for RELEASE_DELAY"""
+    if name and name != DEFAULT_PHOTO:
+        enqueue(release_photo.task_name, [name], run_after=timezone.now() + RELEASE_DELAY)
+
+
+@task
+def release_photo(name):
+    """Remove photo `name` and its resized copies if no item uses it"""
+    from .images import DERIVATIVE_FORMATS, DERIVATIVE_SIZES, derivative_name
+    from .models import Item
+
+    if Item.objects.filter(photo=name).exists():
+        return
+    # Moved aside first, an upload reusing it from now on writes it again
+    path = photo_storage.path(name)
+    released = f'{path}.released'
+    try:
+        os.replace(path, released)
+    except FileNotFoundError:
+        return
+    if os.stat(released).st_mtime > time.time() - RELEASE_DELAY.total_seconds():
+        # Reused lately, its item may not be committed yet: put it back and look again later.
+        # The bytes are the same whatever the name, so replacing a fresh copy is harmless.
+        os.replace(released, path)
+        release(name)
+        return
+    os.remove(released)
+    # An upload of the same bytes may have written the photo again and been
+    # committed meanwhile, its resized copies are the same files
+    if Item.objects.filter(photo=name).exists() or os.path.exists(path):
+        return
+    for size in DERIVATIVE_SIZES:
+        for extension in DERIVATIVE_FORMATS:
+            default_storage.delete(derivative_name(name, size, extension))
+
+
+def photo_name(item):
+    """Photo name without loading a deferred field (None if it isn't loaded)"""
+    photo = item.__dict__.get('photo')
+    return getattr(photo, 'name', photo)
+
+
+def item_saved(sender, instance, **kwargs):
+    old = getattr(instance, '_loaded_photo', None)
+    new = photo_name(instance)
+    if old and new is not None and old != new:
+        instance._loaded_photo = new
+        release(old)
+
+
+def item_deleted(sender, instance, **kwargs):
+    name = photo_name(instance)
+    if name:
+        release(name)
@@ -0,0 +1,17 @@
+"""
+{% item_version as version %} gives the global item version (see
+items/fragments.py) for use in {% cache %} keys of fragments that list items:
+
+    {% item_version as version %}
+    {% cache 600 home_slider version %}...{% endcache %}
+"""
+from django import template
+
+from items.fragments import item_version as current_item_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def item_version():
+    return current_item_version()
@@ -0,0 +1,62 @@
+"""
+{% item_photo item 'card' %} renders an item photo from its resized copies.
+
+Outputs a <picture> with a WebP srcset and a JPEG fallback, lazy loaded, so
+the browser downloads the smallest file that fits. Until the derivatives
+exist (they are built in the background) the original upload is used.
+
+Extra keyword arguments become attributes on the <img>, underscores turn
+into dashes: class_name='x' -> class="x", data_title='y' -> data-title="y".
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# How wide the image is drawn on screen for each size, for the sizes attribute
+DISPLAY_SIZES = {
+    'thumb': '80px',
+    'card': '(max-width: 600px) 100vw, 320px',
+    'detail': '(max-width: 1000px) 100vw, 800px',
+}
+
+
+def _srcset(derivatives, extension):
+    return ', '.join(
+        f"{default_storage.url(entry[extension])} {entry['width']}w"
+        for entry in sorted(derivatives.values(), key=lambda entry: entry['width'])
+        if extension in entry
+    )
+
+
+@register.simple_tag
+def item_photo(item, size='card', alt=None, lazy=True, **attrs):
+    if not item.photo:
+        return ''
+
+    if 'class_name' in attrs:
+        attrs['class'] = attrs.pop('class_name')
+    attrs = {name.replace('_', '-'): value for name, value in attrs.items()}
+    attrs['alt'] = item.name if alt is None else alt
+    attrs['decoding'] = 'async'
+    if lazy:
+        attrs['loading'] = 'lazy'
+
+    derivatives = item.photo_derivatives or {}
+    entry = derivatives.get(size)
+    if not entry:
+        attrs['src'] = item.photo.url
+        return format_html('<img {}>', format_html_join(' ', '{}="{}"', attrs.items()))
+
+    attrs['src'] = default_storage.url(entry['jpeg'])
+    attrs['srcset'] = _srcset(derivatives, 'jpeg')
+    attrs['sizes'] = DISPLAY_SIZES[size]
+    attrs['width'] = entry['width']
+    attrs['height'] = entry['height']
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img {}></picture>',
+        _srcset(derivatives, 'webp'),
+        DISPLAY_SIZES[size],
+        format_html_join(' ', '{}="{}"', attrs.items()),
+    )
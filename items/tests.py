@@ -1,3 +1,49 @@
-from django.test import TestCase
+from django.core.cache import cache
 
-# Create your tests here.
+from lostandfound.testing import QueryCountTestMixin, SeededTestCase
+
+from .fuzzy import trigram_index
+from .models import Item
+from .search import sqlite_fts_available
+
+
+class ItemQueryCountTests(QueryCountTestMixin, SeededTestCase):
+    query_count_urlconfs = ('items.urls',)
+
+    def setUp(self):
+        super().setUp()
+        # Looked up once per process, not part of any page's count
+        sqlite_fts_available()
+        self.item = Item.objects.filter(status='unclaimed').order_by('pk').first()
+
+    def test_query_counts(self):
+        reported = Item.objects.filter(status='reported').order_by('pk').first()
+        self.client.force_login(self.staff)
+        self.assertQueryCounts({
+            'report_item': 1,
+            'item_list': 3,
+            ('item_detail', self.item.pk): 2,
+            ('edit_item', self.item.pk): 2,
+            ('delete_item', self.item.pk): 1,
+            ('discard_item', self.item.pk): 1,
+            ('approve_item', reported.pk): 2,
+            'my_items': 2,
+        })
+
+    def test_owner_query_counts(self):
+        self.client.force_login(self.item.submitted_by)
+        # The first page also loads the user into the cache
+        self.assertQueryCount('/items/my-items/', 3)
+        self.assertQueryCount('/items/?category=electronics', 3)
+        self.assertQueryCount('/items/?q=jacket', 4)
+        self.assertNoRepeatedQueries('/items/?q=jacket&location=Library')
+
+    def test_typo_search_query_count(self):
+        # Built in the background outside tests
+        trigram_index.build()
+        self.addCleanup(setattr, trigram_index, 'state', None)
+        self.client.force_login(self.staff)
+        # item_list's budget: session and user from the database, catching the index up,
+        # and a typo search with filters, searched again without them for the facets
+        cache.clear()
+        self.assertQueryCount('/items/?q=calculater&category=electronics&location=Library', 10)
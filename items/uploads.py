@@ -0,0 +1,89 @@
+"""
+Checking and re-encoding of uploaded item photos.
+
+Uploads are streamed to a temporary file by Django (see FILE_UPLOAD_HANDLERS
+in settings), so the request body is never held in memory. Pillow then reads
+that file a chunk at a time: first only the header, to reject anything that
+isn't a real image or that would decode to too many pixels, then the pixels
+themselves, reduced while decoding where the format allows it.
+
+Every accepted photo is stored as a progressive JPEG of at most
+MAX_STORED_SIDE pixels on its longest side, with the EXIF orientation applied
+and all other metadata (GPS location, camera serial, ...) dropped.
+"""
+import os
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+# Anything bigger decodes to hundreds of MB of pixels (a "decompression bomb")
+MAX_PIXELS = 24_000_000
+
+MAX_STORED_SIDE = 2048
+
+JPEG_OPTIONS = {'quality': 85, 'optimize': True, 'progressive': True}
+
+# Re-encoded photos bigger than this are spooled to disk instead of kept in memory
+SPOOL_SIZE = 1024 * 1024
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP', 'MPO'}
+
+
+def _open(upload):
+    """Open `upload` with Pillow without reading more than the header"""
+    if hasattr(upload, 'temporary_file_path'):
+        return Image.open(upload.temporary_file_path())
+    upload.seek(0)
+    return Image.open(upload)
+
+
+def _flatten(image):
+    """RGB copy of `image`, transparent areas become white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def prepare_photo(upload):
+    """
+    Validate an uploaded photo and return a re-encoded copy to store instead.
+    Raises ValidationError for files that aren't usable images.
+    """
+    try:
+        image = _open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('The uploaded file is not a valid image.')
+
+    with image:
+        if image.format not in ALLOWED_FORMATS:
+            raise ValidationError('Only JPG, PNG, GIF, and WEBP image files are allowed.')
+
+        width, height = image.size
+        if width * height > MAX_PIXELS:
+            raise ValidationError(
+                f'Image is too large ({width}x{height}). Please upload a photo under {MAX_PIXELS // 1_000_000} megapixels.'
+            )
+
+        # JPEGs decode straight to 1/2, 1/4 or 1/8 scale if that is still big enough
+        image.draft('RGB', (MAX_STORED_SIDE, MAX_STORED_SIDE))
+        try:
+            image.load()
+        except (OSError, SyntaxError, ValueError):
+            raise ValidationError('The uploaded image is damaged or incomplete.')
+
+        image = ImageOps.exif_transpose(image)
+        image = _flatten(image)
+        image.thumbnail((MAX_STORED_SIDE, MAX_STORED_SIDE), Image.LANCZOS)
+
+    stem = os.path.splitext(os.path.basename(upload.name))[0] or 'photo'
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    # No exif= argument, so none of the original metadata is written
+    image.save(output, 'JPEG', **JPEG_OPTIONS)
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(output, name=f'{stem}.jpg', content_type='image/jpeg', size=size)
@@ -1,10 +1,23 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
 from django.utils import timezone
+from lostandfound.pagination import DEFAULT_ORDERING, paginate_keyset, wants_partial
+from lostandfound.queries import query_budget
 from .models import Item
+from .conditional import conditional_page, item_list_validator, item_validator, my_items_validator
+from .duplicates import find_duplicates, set_photo_hash
+from .facets import facet_counts
 from .forms import ItemForm
+from .images import schedule_derivatives
+from .search import SEARCH_ORDERING, search_items, tokenize
+
+def filter_items(items, category=None, location=None):
+    if category:
+        items = items.filter(category=category)
+    if location:
+        items = items.filter(location_found=location)
+    return items
 
 # Create your views here.
 @login_required
@@ -14,8 +27,16 @@ def report_item(request):
         if form.is_valid():
             item = form.save(commit=False)
             item.submitted_by = request.user
+            set_photo_hash(item)
             item.save()
+            schedule_derivatives(item)
             messages.success(request, 'Item reported successfully! Please bring the physical item to the Lost & Found office for verification. Once staff approves it, the item will be available for claims.')
+
+            # Let the reporter know if this looks like something already reported
+            duplicates = find_duplicates(item, limit=3)
+            if duplicates:
+                names = ', '.join(f'"{duplicate.name}"' for duplicate in duplicates)
+                messages.warning(request, f'This photo looks very similar to an item that was already reported ({names}). Staff will check whether it is the same item.')
             return redirect('item_detail', pk=item.pk)
     else:
         form = ItemForm()
@@ -23,37 +44,75 @@ def report_item(request):
     return render(request, 'items/report_item.html', {'form': form})
 
 @login_required
+# A typo search with filters on a cold facet cache searches twice, with and without the
+# filters, after catching the typo index up with other workers' edits (see items/tests.py)
+@query_budget(10)
+@conditional_page(item_list_validator)
 def item_list(request):
     # Show items that are unclaimed or have rejected claims (available for new claims)
-    items = Item.objects.filter(status__in=['unclaimed', 'rejected'])
+    available = Item.objects.filter(status__in=['unclaimed', 'rejected']).for_cards()
+    category = request.GET.get('category')
+    location = request.GET.get('location')
+    items = filter_items(available, category, location)
+    ordering = DEFAULT_ORDERING
 
+    # Full-text search with a typo-tolerant fallback, best matches first (see items/search.py).
+    # Filters go first, so the fallback is only used when the filtered search finds nothing.
     query = request.GET.get('q')
     if query:
-        items = items.filter(
-            Q(name__icontains=query) | Q(description__icontains=query)
-        )
+        items = search_items(items, query)
+        if tokenize(query):
+            ordering = SEARCH_ORDERING
 
-    category = request.GET.get('category')
-    if category:
-        items = items.filter(category=category)
+    page = paginate_keyset(items, request.GET.get('cursor'), ordering=ordering, params=request.GET)
 
-    # Get categories from the model for dynamic filtering
-    categories = Item.CATEGORY_CHOICES
+    # "Load more" only needs the next batch of cards
+    if wants_partial(request):
+        return render(request, 'items/_item_page.html', {'page': page})
+
+    # Counts per category/location for the search text, before those filters apply (cached).
+    # Without filters that is the search above, otherwise it is searched again on a cache miss.
+    if category or location:
+        facets = facet_counts(lambda: search_items(available, query) if query else available, query)
+    else:
+        facets = facet_counts(items, query)
+    category_counts = facets['categories']
+
+    # Get categories from the model for dynamic filtering, with how many results each would give
+    categories = [
+        (value, label, category_counts.get(value, 0))
+        for value, label in Item.CATEGORY_CHOICES
+    ]
 
     return render(request, 'items/item_list.html', {
-        'items': items,
+        'items': page,
+        'page': page,
         'categories': categories,
+        'locations': facets['locations'],
+        'total_count': facets['total'],
     })
 
 @login_required
+@query_budget(4)
+@conditional_page(item_validator)
 def item_detail(request, pk):
-    item = get_object_or_404(Item, pk=pk)
+    # The page shows who reported, received and discarded the item
+    item = get_object_or_404(Item.objects.select_related('submitted_by', 'returned_to', 'discarded_by'), pk=pk)
     return render(request, 'items/item_detail.html', {'item': item})
 
 @login_required
+@query_budget(4)
+@conditional_page(my_items_validator)
 def my_items(request):
-    items = Item.objects.filter(submitted_by=request.user)
-    return render(request, 'items/my_items.html', {'items': items})
+    items = Item.objects.filter(submitted_by=request.user).for_cards(
+        'returned_to__username', 'returned_to__first_name', 'returned_to__last_name'
+    ).select_related('returned_to')
+    page = paginate_keyset(items, request.GET.get('cursor'), params=request.GET)
+
+    if wants_partial(request):
+        return render(request, 'items/_item_page.html', {'page': page, 'show_returned_to': True})
+
+    return render(request, 'items/my_items.html', {'items': page, 'page': page})
 
 @login_required
 def edit_item(request, pk):
@@ -71,7 +130,12 @@ def edit_item(request, pk):
     if request.method == 'POST':
         form = ItemForm(request.POST, request.FILES, instance=item)
         if form.is_valid():
+            if 'photo' in form.changed_data:
+                item.photo_derivatives = {}
+                set_photo_hash(item)
             form.save()
+            if 'photo' in form.changed_data:
+                schedule_derivatives(item)
             messages.success(request, f'Item "{item.name}" has been updated successfully.')
             return redirect('item_detail', pk=pk)
     else:
@@ -162,5 +226,8 @@ def approve_item(request, pk):
         messages.success(request, f'Item "{item.name}" has been approved and is now available for claims.')
         return redirect('item_list')
 
-    # If GET request, show confirmation page
-    return render(request, 'items/approve_item.html', {'item': item})
\ No newline at end of file
+    # If GET request, show confirmation page with any earlier reports of the same item
+    return render(request, 'items/approve_item.html', {
+        'item': item,
+        'duplicates': find_duplicates(item),
+    })
\ No newline at end of file
@@ -0,0 +1,413 @@
+"""
+Load test harness behind `manage.py run_benchmark` and `compare_benchmarks`.
+
+A run:
+1. creates a throwaway database the way the test runner does (a file in a
+   temporary directory on SQLite, test_<name> on Postgres) and fills it with
+   a generated, seeded dataset of the requested size
+2. starts the app in gunicorn (runserver if gunicorn is missing) with
+   lostandfound/settings_benchmark.py, so DEBUG is off
+3. logs in `concurrency` sessions over HTTP, a few of them as staff, and
+   has each one request a weighted random mix of the main pages for a fixed
+   time after a warm-up
+4. writes the latency percentiles and throughput per page as JSON
+
+Everything runs on this machine, nothing is fetched from the network.
+Results of two runs (for example two commits) can be compared with
+`compare`, which flags pages that got slower than a tolerance allows.
+"""
+import http.client
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import namedtuple
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from PIL import Image
+
+from items.models import Item
+from lostandfound import seeding
+
+User = get_user_model()
+
+RESULTS_VERSION = 1
+
+# One staff session for every this many sessions (at least one)
+SESSIONS_PER_STAFF = 4
+
+# How often (student weight, staff weight) each page is picked. submit_claim
+# and report_item load the form and post it, each step is measured separately.
+SCENARIOS = {
+    'home': (10, 10),
+    'item_list': (20, 5),
+    'item_search': (15, 5),
+    'item_detail': (20, 10),
+    'admin_claims': (0, 40),
+    'submit_claim': (5, 0),
+    'report_item': (3, 0),
+}
+
+COLORS = ['Black', 'Blue', 'Red', 'Green', 'White', 'Gray', 'Pink', 'Silver', 'Purple', 'Orange']
+THINGS = [
+    ('Water Bottle', 'personal'), ('Backpack', 'bags'), ('Hoodie', 'clothing'), ('Calculator', 'supplies'),
+    ('Earbuds', 'electronics'), ('Phone Charger', 'electronics'), ('Jacket', 'clothing'), ('Keys', 'keys'),
+    ('Student ID', 'keys'), ('Notebook', 'supplies'), ('Necklace', 'accessories'), ('Basketball', 'equipment'),
+    ('Lunch Box', 'personal'), ('Umbrella', 'other'), ('Laptop', 'electronics'), ('Glasses Case', 'accessories'),
+]
+LOCATIONS = ['Cafeteria', 'Gym', 'Library', 'Main Office', 'Parking Lot', 'Math Lab', 'Auditorium', 'Room 204', 'Room 312', 'Bus Loop']
+DETAILS = [
+    'with a sticker on the side', 'name written inside', 'slightly scratched', 'brand logo on the front',
+    'found under a table', 'has a keychain attached', 'left after practice', 'in a clear plastic bag',
+]
+
+Dataset = namedtuple('Dataset', ['students', 'staff', 'available_items', 'search_terms', 'sizes'])
+Response = namedtuple('Response', ['status', 'body', 'seconds'])
+
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def build_dataset(items=2000, claims=1000, users=200, seed=1):
+    """Fill the (empty) database with generated users, items and claims (see lostandfound/seeding.py)"""
+    try:
+        seeding.seed(items, claims, users, seed=seed)
+    except seeding.SeedError as error:
+        raise BenchmarkError(str(error))
+
+    seeded = User.objects.filter(username__startswith=f'seed{seed}_', approval_status='approved').order_by('id')
+    return Dataset(
+        students=list(seeded.filter(user_type='student').values_list('username', flat=True)),
+        staff=list(seeded.filter(user_type='teacher').values_list('username', flat=True)),
+        available_items=list(Item.objects.filter(status__in=['unclaimed', 'rejected']).values_list('id', flat=True)),
+        search_terms=sorted({thing.split()[0].lower() for things in seeding.THINGS.values() for thing in things})
+        + [color.lower() for color in seeding.COLORS],
+        sizes={'items': items, 'claims': claims, 'users': users, 'seed': seed},
+    )
+
+
+def create_database(directory):
+    """Switch this process to a new, migrated benchmark database. Returns (old name, new name)."""
+    old_name = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    new_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    return old_name, new_name
+
+
+def destroy_database(old_name):
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_name, media_root, port, workers):
+    """Start the app in a child process, returns (process, description)"""
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='lostandfound.settings_benchmark',
+        BENCHMARK_DB_NAME=database_name,
+        BENCHMARK_MEDIA_ROOT=media_root,
+    )
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        command = [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{port}']
+        description = 'runserver'
+    else:
+        command = [
+            sys.executable, '-m', 'gunicorn', 'lostandfound.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+        ]
+        description = f'gunicorn, {workers} workers'
+
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return process, description
+
+
+def wait_for_server(process, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise BenchmarkError(f'Server exited: {process.stderr.read().decode(errors="replace")[-2000:]}')
+        try:
+            if HttpSession(port).get('/login/').status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise BenchmarkError(f'Server did not answer on port {port} within {timeout}s')
+
+
+class HttpSession:
+    """A minimal browser: keeps cookies, does not follow redirects"""
+
+    def __init__(self, port):
+        self.port = port
+        self.cookies = {}
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            content = response.read()
+        finally:
+            conn.close()
+        seconds = time.perf_counter() - started
+
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return Response(response.status, content, seconds)
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, fields, files=None):
+        """Post a form, with the CSRF token a previous GET of the page returned"""
+        headers = {'Referer': f'http://127.0.0.1:{self.port}{path}'}
+        if files:
+            body, content_type = multipart(fields, files)
+        else:
+            body, content_type = urlencode(fields).encode(), 'application/x-www-form-urlencoded'
+        headers['Content-Type'] = content_type
+        return self.request('POST', path, body, headers)
+
+    def csrf_token(self, response):
+        match = CSRF_INPUT.search(response.body.decode(errors='replace'))
+        return match.group(1) if match else self.cookies.get('csrftoken', '')
+
+    def log_in(self, username):
+        form = self.get('/login/')
+        response = self.post('/login/', {
+            'csrfmiddlewaretoken': self.csrf_token(form), 'username': username, 'password': seeding.PASSWORD,
+        })
+        if response.status != 302 or 'sessionid' not in self.cookies:
+            raise BenchmarkError(f'Could not log in as {username} (HTTP {response.status})')
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode()
+        )
+        body.write(content + b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def sample_photos(rng, count=8):
+    """Small distinct JPEGs for report_item, made locally"""
+    photos = []
+    for _ in range(count):
+        image = Image.new('RGB', (640, 480), tuple(rng.randrange(256) for _ in range(3)))
+        for _ in range(12):
+            x, y = rng.randrange(600), rng.randrange(440)
+            image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + rng.randint(20, 200), y + rng.randint(20, 200)))
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=80)
+        photos.append(output.getvalue())
+    return photos
+
+
+def run_scenario(name, session, rng, dataset, photos, record):
+    """Make the requests of one scenario, calling record(page, response) for each"""
+    if name == 'home':
+        record('home', session.get('/'))
+    elif name == 'item_list':
+        record('item_list', session.get('/items/'))
+    elif name == 'item_search':
+        record('item_search', session.get('/items/?' + urlencode({'q': rng.choice(dataset.search_terms)})))
+    elif name == 'item_detail':
+        record('item_detail', session.get(f'/items/{rng.choice(dataset.available_items)}/'))
+    elif name == 'admin_claims':
+        record('admin_claims', session.get('/claims/admin/?status=' + rng.choice(['pending_approval', 'pending', 'all'])))
+    elif name == 'submit_claim':
+        path = f'/claims/{rng.choice(dataset.available_items)}/submit/'
+        form = session.get(path)
+        record('submit_claim_form', form)
+        if form.status == 200:
+            record('submit_claim', session.post(path, {
+                'csrfmiddlewaretoken': session.csrf_token(form),
+                'claim_type': 'claim',
+                'description': f'My {rng.choice(COLORS).lower()} {rng.choice(THINGS)[0].lower()}, {rng.choice(DETAILS)}.',
+                'contact_method': 'Email',
+            }))
+    elif name == 'report_item':
+        form = session.get('/items/report/')
+        record('report_item_form', form)
+        color = rng.choice(COLORS)
+        thing, category = rng.choice(THINGS)
+        record('report_item', session.post('/items/report/', {
+            'csrfmiddlewaretoken': session.csrf_token(form),
+            'name': f'{color} {thing}',
+            'category': category,
+            'description': f'{color} {thing.lower()} {rng.choice(DETAILS)}.',
+            'location_found': rng.choice(LOCATIONS),
+            'date_found': timezone.localdate().isoformat(),
+        }, files={'photo': ('photo.jpg', rng.choice(photos), 'image/jpeg')}))
+
+
+def run_session(session, staff, scenarios, dataset, photos, seed, warmup_until, stop_at):
+    """One simulated user. Returns [(page, seconds, ok)] measured after the warm-up."""
+    rng = random.Random(seed)
+    weights = [(name, SCENARIOS[name][1 if staff else 0]) for name in scenarios]
+    allowed = [(name, weight) for name, weight in weights if weight]
+    if not allowed:
+        return []
+    results = []
+
+    def record(page, response):
+        if time.monotonic() >= warmup_until:
+            results.append((page, response.seconds, response.status < 400))
+
+    while time.monotonic() < stop_at:
+        try:
+            run_scenario(_weighted(rng, allowed), session, rng, dataset, photos, record)
+        except OSError:
+            results.append(('connection errors', 0.0, False))
+    return results
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, duration):
+    """{page: stats} in milliseconds and requests per second"""
+    pages = {}
+    for page, seconds, ok in samples:
+        pages.setdefault(page, []).append((seconds, ok))
+
+    summary = {}
+    for page, measured in sorted(pages.items()):
+        latencies = sorted(seconds * 1000 for seconds, _ in measured)
+        summary[page] = {
+            'requests': len(measured),
+            'errors': sum(1 for _, ok in measured if not ok),
+            'rps': round(len(measured) / duration, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p90_ms': round(percentile(latencies, 90), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2),
+        }
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def results_document(dataset, load, server, samples, duration):
+    pages = summarize(samples, duration)
+    total = sum(page['requests'] for page in pages.values())
+    return {
+        'version': RESULTS_VERSION,
+        'created': timezone.now().isoformat(),
+        'commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'server': server,
+            'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs',
+        },
+        'dataset': dataset.sizes,
+        'load': load,
+        'total': {
+            'requests': total,
+            'errors': sum(page['errors'] for page in pages.values()),
+            'rps': round(total / duration, 2),
+        },
+        'pages': pages,
+    }
+
+
+def load_results(path):
+    with open(path) as results:
+        document = json.load(results)
+    if document.get('version') != RESULTS_VERSION:
+        raise BenchmarkError(f'{path} is not a version {RESULTS_VERSION} benchmark result')
+    return document
+
+
+# Latency changes smaller than this many ms are noise, whatever the percentage
+MIN_CHANGE_MS = 2.0
+
+Comparison = namedtuple('Comparison', ['page', 'metric', 'before', 'after', 'change', 'regressed'])
+
+
+def compare(before, after, tolerance=0.15):
+    """
+    Compare two result documents. A page regressed if its p50 or p99 latency
+    grew by more than `tolerance`, or it had more errors; the run regressed
+    if total throughput fell by more than `tolerance`. Per page throughput
+    depends on the request mix, so it is not compared.
+    """
+    rows = []
+    for page, old in before['pages'].items():
+        new = after['pages'].get(page)
+        if new is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if old[metric]:
+                change = (new[metric] - old[metric]) / old[metric]
+                regressed = change > tolerance and new[metric] - old[metric] >= MIN_CHANGE_MS
+                rows.append(Comparison(page, metric, old[metric], new[metric], change, regressed))
+        if new['errors'] > old['errors']:
+            rows.append(Comparison(page, 'errors', old['errors'], new['errors'], None, True))
+
+    old_rps, new_rps = before['total']['rps'], after['total']['rps']
+    if old_rps:
+        change = (new_rps - old_rps) / old_rps
+        rows.append(Comparison('total', 'rps', old_rps, new_rps, change, change < -tolerance))
+    return rows
@@ -0,0 +1,139 @@
+"""
+Serving of uploaded files (MEDIA_ROOT), in production as well as development.
+
+- access: MEDIA_ACCESS_CHECK names a function (request, path) -> bool, files
+  it refuses are a 404 (items.media.can_view checks the item a photo belongs
+  to). Set it to None to serve every file.
+- validators: the ETag comes from the file's size and modification time,
+  Last-Modified from the latter, unchanged files get a 304
+- caching: files are cached for MEDIA_CACHE_MAX_AGE seconds, privately when
+  access is checked so shared caches don't hand them to others
+- transfer: with MEDIA_ACCEL = 'nginx' the response only carries an
+  X-Accel-Redirect to MEDIA_ACCEL_LOCATION + path and nginx sends the file,
+  Range requests included. With 'sendfile' X-Sendfile carries the file's
+  path (Apache mod_xsendfile, lighttpd). Otherwise FileResponse hands the
+  open file to the WSGI server, which sends it with sendfile() where it can
+  (gunicorn does), so no worker copies photo bytes through Python.
+- Range: without a front-end server, one byte range gets a 206 (if If-Range
+  still matches) and anything else the whole file
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.utils.module_loading import import_string
+
+from .queries import query_budget
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def access_check():
+    return import_string(settings.MEDIA_ACCESS_CHECK) if settings.MEDIA_ACCESS_CHECK else None
+
+
+def byte_range(header, size):
+    """
+    (first, last) byte of a single 'bytes=' range, None to send the whole
+    file instead, False when the range lies outside the file
+    """
+    match = RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500 is the last 500 bytes
+        return (max(size - int(last), 0), size - 1) if int(last) else False
+    first, last = int(first), min(int(last), size - 1) if last else size - 1
+    if last < first:
+        return None if first < size else False
+    return first, last
+
+
+def range_still_valid(request, etag, modified):
+    """If-Range: serve the range only if the browser's copy is still this file"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == modified
+
+
+def read_range(path, first, last):
+    with open(path, 'rb') as file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request, full_path, path, size, etag, modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if settings.MEDIA_ACCEL == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_LOCATION + quote(path)
+        return response
+    if settings.MEDIA_ACCEL == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    requested = request.headers.get('Range')
+    if requested and range_still_valid(request, etag, modified):
+        span = byte_range(requested, size)
+        if span is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if span is not None:
+            first, last = span
+            response = StreamingHttpResponse(read_range(full_path, first, last), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+            response['Content-Length'] = last - first + 1
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@query_budget(3)
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        info = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('No such file')
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('No such file')
+
+    check = access_check()
+    if check is not None and not check(request, path):
+        raise Http404('No such file')
+
+    etag = quote_etag(f'{info.st_mtime_ns:x}-{info.st_size:x}')
+    modified = int(info.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        response = file_response(request, full_path, path, info.st_size, etag, modified)
+    if response.status_code in (200, 206, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        patch_cache_control(response, max_age=settings.MEDIA_CACHE_MAX_AGE,
+                            **({'private': True} if check is not None else {'public': True}))
+    return response
@@ -0,0 +1,215 @@
+"""
+Where does the time of a slow request go?
+
+ServerTimingMiddleware adds a Server-Timing header to every response, which
+browsers show in the network panel:
+
+    Server-Timing: db;dur=41.2;desc="12 queries", tpl;dur=18.0, view;dur=9.5, total;dur=68.7
+
+- db: time spent in SQL
+- tpl: template rendering, not counting SQL run from templates
+- view: everything else (view code, forms, middleware)
+
+The latest requests slower than SLOW_REQUEST_THRESHOLD (milliseconds) are
+kept in a short list in the cache, shown to staff at /staff/slow-requests/.
+
+ProfilerMiddleware runs a request under cProfile when a staff member asks for
+it with ?profile=1 or an `X-Profile: 1` header. The profile is saved under
+PROFILE_DIR and can be downloaded from the slow requests page (open it with
+`python -m pstats` or snakeviz). The response's X-Profile-Url header links to
+it. Without the switch the middleware only looks at the query string.
+"""
+import cProfile
+import os
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.template.backends.django import DjangoTemplates
+from django.urls import reverse
+from django.utils import timezone
+
+SLOW_REQUESTS_KEY = 'profiling:slow_requests'
+SLOW_REQUESTS_KEPT = 50
+SLOW_REQUESTS_TIMEOUT = 60 * 60 * 24
+
+# Saved profiles beyond this many are deleted, oldest first
+PROFILES_KEPT = 50
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def header(self, total):
+        view = max(total - self.db - self.template, 0)
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template * 1000:.1f}, '
+            f'view;dur={view * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+class ServerTimingMiddleware:
+    """Put first in MIDDLEWARE so the total covers the other middleware too"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow = getattr(settings, 'SLOW_REQUEST_THRESHOLD', 500) / 1000
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timing))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = time.perf_counter() - timing.started
+        response['Server-Timing'] = timing.header(total)
+        # Profiled requests are listed whatever their time, with a link to the profile
+        if total >= self.slow or hasattr(request, 'profile_name'):
+            record_slow_request(request, response, timing, total)
+        return response
+
+
+def record_slow_request(request, response, timing, total):
+    match = getattr(request, 'resolver_match', None)
+    entry = {
+        'method': request.method,
+        'path': request.get_full_path()[:300],
+        'view': match.view_name if match else '',
+        'status': response.status_code,
+        'total': total * 1000,
+        'db': timing.db * 1000,
+        'queries': timing.queries,
+        'template': timing.template * 1000,
+        'at': timezone.now(),
+        'profile': getattr(request, 'profile_name', ''),
+    }
+    # Best effort: two processes recording at once may drop one entry
+    entries = cache.get(SLOW_REQUESTS_KEY, []) + [entry]
+    entries.sort(key=lambda slow: slow['at'], reverse=True)
+    cache.set(SLOW_REQUESTS_KEY, entries[:SLOW_REQUESTS_KEPT], SLOW_REQUESTS_TIMEOUT)
+
+
+class TimedTemplate:
+    """A template whose render time counts towards the request's tpl timing"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timing = _current.get()
+        if timing is None:
+            return self.template.render(context, request)
+
+        started = time.perf_counter()
+        db_before = timing.db
+        try:
+            return self.template.render(context, request)
+        finally:
+            # SQL run by the template (lazy relations) is already counted as db
+            timing.template += time.perf_counter() - started - (timing.db - db_before)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timed. Set as BACKEND in TEMPLATES."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def wants_profile(request):
+    return request.GET.get('profile') == '1' or request.headers.get('x-profile') == '1'
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+
+
+class ProfilerMiddleware:
+    """Put after AuthenticationMiddleware, it needs request.user"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (wants_profile(request) and request.user.is_staff):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+
+        name = save_profile(profiler, request)
+        request.profile_name = name
+        response['X-Profile-Url'] = reverse('download_profile', args=[name])
+        return response
+
+
+def save_profile(profiler, request):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    slug = re.sub(r'[^\w]+', '-', request.path).strip('-')[:60] or 'root'
+    name = f'{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method.lower()}-{slug}.prof'
+    profiler.dump_stats(os.path.join(directory, name))
+
+    # Names start with the time, so sorting them sorts by age
+    saved = sorted(entry for entry in os.listdir(directory) if PROFILE_NAME.match(entry))
+    for old in saved[:-PROFILES_KEPT]:
+        os.remove(os.path.join(directory, old))
+    return name
+
+
+@staff_member_required
+def slow_requests(request):
+    directory = profile_dir()
+    profiles = []
+    if os.path.isdir(directory):
+        profiles = sorted((entry for entry in os.listdir(directory) if PROFILE_NAME.match(entry)), reverse=True)
+
+    return render(request, 'profiling/slow_requests.html', {
+        'slow_requests': cache.get(SLOW_REQUESTS_KEY, []),
+        'threshold': getattr(settings, 'SLOW_REQUEST_THRESHOLD', 500),
+        'profiles': profiles,
+    })
+
+
+@staff_member_required
+def download_profile(request, name):
+    path = os.path.join(profile_dir(), name)
+    if not PROFILE_NAME.match(name) or not os.path.isfile(path):
+        raise Http404('No such profile')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
@@ -0,0 +1,122 @@
+"""
+SQL query inspection for development and staging.
+
+QueryInspectorMiddleware records every statement a request runs. At the end
+of the request it looks for N+1 patterns, the same query shape (SQL with the
+parameters left out) repeated many times, usually a template following
+`claim.item` or `item.submitted_by` once per row, and checks the count
+against the view's budget:
+
+    @login_required
+    @query_budget(8)
+    def item_list(request): ...
+
+A budget counts every query of the request, including the session and user
+lookups, so it is the count on a cold cache. Going over it logs an error, or
+raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on (SeededTestCase
+turns it on, see lostandfound/testing.py) so the regression can't be missed.
+
+The middleware is off unless QUERY_INSPECTOR is set (it follows DEBUG).
+See lostandfound/testing.py for locking query counts in tests.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# The same shape this many times in one request is reported as an N+1
+REPEAT_THRESHOLD = 5
+
+# IN (%s, %s, %s) and IN (?, ?) are the same shape whatever the list length
+IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most queries a request to this view may run"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def query_shape(sql):
+    return IN_LIST.sub('IN (...)', WHITESPACE.sub(' ', sql.strip()))
+
+
+class QueryLog:
+    """Every statement run on any database while it is active"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for alias in connections:
+            self.stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """[(shape, times)] for the shapes run at least `threshold` times, most first"""
+        shapes = Counter(query_shape(sql) for sql, _ in self.queries)
+        return [(shape, times) for shape, times in shapes.most_common() if times >= threshold]
+
+
+class QueryInspectorMiddleware:
+    """Reports N+1 query patterns and views that go over their query budget"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'QUERY_BUDGET_STRICT', False)
+        self.threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', REPEAT_THRESHOLD)
+
+    def __call__(self, request):
+        with QueryLog() as log:
+            response = self.get_response(request)
+
+        view = getattr(request, 'query_inspector_view', request.path)
+        for shape, times in log.repeated(self.threshold):
+            logger.warning('Possible N+1 in %s: %s queries like %s', view, times, shape)
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and log.count > budget:
+            message = f'{view} ran {log.count} queries, its budget is {budget}'
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_inspector_view = f'{view_func.__module__}.{view_func.__name__}'
+        request.query_budget = getattr(view_func, 'query_budget', None)
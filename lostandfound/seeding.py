@@ -0,0 +1,335 @@
+"""
+Generated data at scale for `manage.py seed_data --items N ...` and the
+benchmark (lostandfound/benchmark.py).
+
+The same seed always gives the same data. Each item's story follows from its
+age, as it would in a school that has run the app for a while:
+- reported items are a few days old at most, staff approve them within two days
+- an approved item is unclaimed, has a rejected claim, or was claimed and
+  verified; verified items are picked up (returned) or, after 60 days, not
+- items left unclaimed for 90 days are discarded, as auto_discard_items does
+Claims match the item's status: a returned item has one completed claim by
+the person it went to, a verified item one approved claim, a rejected item
+at least one rejected claim, and any item can have a few more pending,
+rejected or inquiry-only claims.
+
+Rows are written with bulk_create in batches, items and their claims
+together, so memory stays flat and a million items take minutes. Photos come
+from a small pool of generated images whose resized copies are built once
+and shared. Seeded items have no perceptual hash; they would all match each
+other in the duplicate photo check.
+"""
+import io
+import random
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from accounts.models import StudentProfile, TeacherProfile
+from claims.models import Claim
+from claims.queues import clear_queue_counts
+from items.discard import PICKUP_DAYS, UNCLAIMED_DAYS
+from items.facets import bump_facet_version
+from items.fragments import bump_item_version
+from items.images import build_derivatives
+from items.models import Item
+
+User = get_user_model()
+
+PASSWORD = 'password123'
+BATCH_SIZE = 2000
+PHOTO_POOL_SIZE = 12
+PHOTO_POOL_DIR = 'items/seed'
+
+# Weighted choices, roughly what a high school lost and found sees
+CATEGORIES = [
+    ('clothing', 22), ('electronics', 18), ('supplies', 15), ('keys', 10), ('personal', 9),
+    ('bags', 8), ('accessories', 8), ('equipment', 7), ('other', 3),
+]
+THINGS = {
+    'clothing': ['Hoodie', 'Jacket', 'Sweatshirt', 'Beanie', 'Scarf', 'Gym Shorts', 'Rain Coat', 'Gloves'],
+    'electronics': ['Earbuds', 'Phone Charger', 'Phone', 'Laptop', 'Calculator', 'Headphones', 'Smart Watch', 'USB Drive'],
+    'supplies': ['Notebook', 'Binder', 'Pencil Case', 'Textbook', 'Planner', 'Ruler', 'Folder', 'Sketchbook'],
+    'keys': ['Student ID', 'Car Keys', 'House Keys', 'Locker Key', 'Bus Pass', 'Key Ring'],
+    'personal': ['Water Bottle', 'Lunch Box', 'Umbrella', 'Wallet', 'Glasses', 'Makeup Bag'],
+    'bags': ['Backpack', 'Gym Bag', 'Tote Bag', 'Laptop Sleeve', 'Drawstring Bag'],
+    'accessories': ['Necklace', 'Bracelet', 'Ring', 'Watch', 'Earrings', 'Hair Clip'],
+    'equipment': ['Basketball', 'Soccer Ball', 'Tennis Racket', 'Shin Guards', 'Baseball Glove', 'Goggles'],
+    'other': ['Instrument Case', 'Art Project', 'Trophy', 'Poster Tube'],
+}
+BRANDS = ['Nike', 'Adidas', 'Apple', 'Samsung', 'Hydro Flask', 'JanSport', 'Under Armour', 'Casio', 'Five Star', 'North Face', '']
+COLORS = ['Black', 'Blue', 'Navy', 'Red', 'Green', 'White', 'Gray', 'Pink', 'Silver', 'Purple', 'Orange', 'Yellow']
+DETAILS = [
+    'with a sticker on the side', 'name written inside', 'slightly scratched', 'logo on the front',
+    'found under a table', 'has a keychain attached', 'left after practice', 'in a clear plastic bag',
+    'initials on the tag', 'cracked in one corner', 'still has a receipt inside', 'zipper is broken',
+]
+LOCATIONS = [
+    ('Cafeteria', 20), ('Gym', 16), ('Library', 10), ('Locker Room', 10), ('Main Office', 6),
+    ('Auditorium', 5), ('Parking Lot', 5), ('Bus Loop', 5), ('Football Field', 5), ('Math Lab', 4),
+    ('Science Wing', 4), ('Art Room', 3), ('Band Room', 3), ('Room 204', 2), ('Room 312', 2),
+]
+DEPARTMENTS = ['Math', 'Science', 'English', 'History', 'Athletics', 'Arts', 'Counseling', 'Front Office']
+FIRST_NAMES = [
+    'Alex', 'Jordan', 'Taylor', 'Sam', 'Riley', 'Casey', 'Morgan', 'Avery', 'Jamie', 'Quinn',
+    'Maya', 'Liam', 'Noah', 'Emma', 'Olivia', 'Aiden', 'Sofia', 'Lucas', 'Mia', 'Ethan',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Lee', 'Garcia', 'Brown', 'Davis', 'Martinez', 'Nguyen', 'Wilson', 'Patel',
+    'Kim', 'Lopez', 'Clark', 'Young', 'Hall', 'Allen', 'Wright', 'Scott', 'Green', 'Baker',
+]
+
+SeedResult = namedtuple('SeedResult', ['users', 'items', 'claims', 'seconds'])
+
+
+class SeedError(Exception):
+    pass
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we set instead of now()"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def photo_pool(rng, size=PHOTO_POOL_SIZE):
+    """[(photo name, derivatives)] of a few generated photos, made once and reused"""
+    pool = []
+    for number in range(size):
+        name = f'{PHOTO_POOL_DIR}/pool-{number:02d}.jpg'
+        if not default_storage.exists(name):
+            image = Image.new('RGB', (800, 600), tuple(rng.randrange(40, 220) for _ in range(3)))
+            draw = ImageDraw.Draw(image)
+            for _ in range(6):
+                x, y = rng.randrange(700), rng.randrange(500)
+                draw.ellipse((x, y, x + rng.randint(60, 300), y + rng.randint(60, 300)),
+                             fill=tuple(rng.randrange(256) for _ in range(3)))
+            output = io.BytesIO()
+            image.save(output, 'JPEG', quality=80)
+            name = default_storage.save(name, ContentFile(output.getvalue()))
+        pool.append((name, build_derivatives(name)))
+    return pool
+
+
+def seed_users(count, rng, now, days, prefix, batch_size):
+    """Create `count` users, about 3% teachers. Returns (student ids, approved student ids, teacher ids)."""
+    password = make_password(PASSWORD)  # hashed once, shared by every seeded user
+    teachers = max(1, count * 3 // 100)
+
+    users = []
+    for number in range(count):
+        teacher = number < teachers
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        joined = now - timedelta(days=rng.uniform(0, days))
+        if teacher:
+            status = 'approved'
+        else:
+            # Recent registrations are the ones still waiting
+            status = 'pending' if joined > now - timedelta(days=7) and rng.random() < 0.5 else weighted(
+                rng, [('approved', 96), ('rejected', 4)]
+            )
+        username = f'{prefix}{"teacher" if teacher else "student"}{number}'
+        users.append(User(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=first,
+            last_name=last,
+            password=password,
+            user_type='teacher' if teacher else 'student',
+            approval_status=status,
+            approval_date=joined + timedelta(hours=rng.uniform(1, 72)) if status != 'pending' else None,
+            date_joined=joined,
+        ))
+
+    students, approved, staff = [], [], []
+    for start in range(0, len(users), batch_size):
+        batch = User.objects.bulk_create(users[start:start + batch_size])
+        profiles, teacher_profiles = [], []
+        for user in batch:
+            if user.user_type == 'teacher':
+                staff.append(user.pk)
+                teacher_profiles.append(TeacherProfile(user=user, department=rng.choice(DEPARTMENTS), created_at=user.date_joined))
+            else:
+                students.append(user.pk)
+                if user.approval_status == 'approved':
+                    approved.append(user.pk)
+                profiles.append(StudentProfile(
+                    user=user, student_id=f'{user.pk:07d}', grade=rng.randint(9, 12), created_at=user.date_joined,
+                ))
+        StudentProfile.objects.bulk_create(profiles)
+        TeacherProfile.objects.bulk_create(teacher_profiles)
+    return students, approved or students, staff
+
+
+def item_story(rng, now, created, claimants):
+    """Status and lifecycle dates for an item reported at `created`"""
+    age = now - created
+    story = {'status': 'reported'}
+    if age < timedelta(days=3) and rng.random() < 0.6:
+        return story
+
+    story['approval_date'] = approved = created + min(timedelta(hours=rng.uniform(1, 48)), age * rng.random())
+    since_approval = now - approved
+
+    outcome = weighted(rng, [('unclaimed', 50), ('rejected', 10), ('verified', 40)])
+    if outcome == 'verified':
+        verified = approved + since_approval * rng.uniform(0.05, 0.6)
+        story.update(verified_date=verified, claimant=rng.choice(claimants))
+        if rng.random() < 0.75:
+            story['status'] = 'returned'
+        elif now - verified > timedelta(days=PICKUP_DAYS):
+            story.update(status='discarded', discard_date=verified + timedelta(days=PICKUP_DAYS),
+                         discard_reason=f'Not picked up within {PICKUP_DAYS} days')
+        else:
+            story['status'] = 'verified'
+        return story
+
+    if age > timedelta(days=UNCLAIMED_DAYS):
+        discarded = min(created + timedelta(days=UNCLAIMED_DAYS, hours=rng.uniform(0, 24)), now)
+        story.update(status='discarded', discard_date=discarded, discard_reason=f'Unclaimed for {UNCLAIMED_DAYS} days')
+        return story
+
+    story['status'] = outcome
+    return story
+
+
+def new_claim(rng, item, claimants, status, created, claimant=None):
+    return Claim(
+        item=item,
+        claimant_id=claimant or rng.choice(claimants),
+        claim_type='inquiry' if status == 'pending' and rng.random() < 0.15 else 'claim',
+        description=f'I lost my {item.name.lower()}, {rng.choice(DETAILS)}.',
+        contact_method=rng.choice(['Email', 'Text', 'Phone call', 'In person']),
+        status=status,
+        match_score=round(rng.uniform(0.05, 0.95), 3),
+        created_at=created,
+        updated_at=created,
+        reviewed_at=created + timedelta(hours=rng.uniform(1, 48)) if status != 'pending' else None,
+    )
+
+
+def deciding_claims(rng, item, story, claimants, now):
+    """The claim the item's status came from: approved/completed for verified items, rejected for rejected ones"""
+    opened = story.get('approval_date')
+    if 'verified_date' in story:
+        status = 'completed' if story['status'] == 'returned' else 'approved'
+        created = opened + (story['verified_date'] - opened) * rng.uniform(0.1, 0.9)
+        return [new_claim(rng, item, claimants, status, created, claimant=story['claimant'])]
+    if story['status'] == 'rejected':
+        return [new_claim(rng, item, claimants, 'rejected', opened + (now - opened) * rng.uniform(0.1, 0.9))]
+    return []
+
+
+def other_claim(rng, item, story, claimants, now):
+    """A claim that didn't decide anything: still pending while the item is open, rejected otherwise"""
+    opened = story['approval_date']
+    closed = story.get('verified_date') or story.get('discard_date') or now
+    created = opened + (closed - opened) * rng.random()
+    status = 'pending' if story['status'] in ('unclaimed', 'rejected') and rng.random() < 0.7 else 'rejected'
+    return new_claim(rng, item, claimants, status, created)
+
+
+def seed(items, claims, users, seed=1, days=365, batch_size=BATCH_SIZE, progress=None):
+    """
+    Add `users` users, `items` items and about `claims` claims. Claims an
+    item's status needs are always made (so there can be more than asked
+    for), others fill up to `claims`. `progress(items_done)` is called after
+    every batch.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    prefix = f'seed{seed}_'
+    if User.objects.filter(username__startswith=prefix).exists():
+        raise SeedError(f'Data for seed {seed} already exists, use another --seed or reset the database')
+    if users < 2:
+        raise SeedError('At least 2 users are needed (a teacher and a student)')
+
+    started = time.monotonic()
+    with explicit_timestamps(StudentProfile, TeacherProfile, Item, Claim):
+        with transaction.atomic():
+            students, claimants, staff = seed_users(users, rng, now, days, prefix, batch_size)
+        pool = photo_pool(random.Random(seed))
+
+        made = done = 0
+        while done < items:
+            batch = []
+            for _ in range(min(batch_size, items - done)):
+                batch.append(new_item(rng, now, days, students, claimants, staff, pool))
+                done += 1
+            with transaction.atomic():
+                Item.objects.bulk_create([item for item, _ in batch])
+                new_claims = []
+                if claims:
+                    for item, story in batch:
+                        new_claims.extend(deciding_claims(rng, item, story, claimants, now))
+                    # Spread the rest over the batch so the total tracks claims * done / items
+                    open_items = [(item, story) for item, story in batch if 'approval_date' in story]
+                    for _ in range(claims * done // items - made - len(new_claims) if open_items else 0):
+                        item, story = rng.choice(open_items)
+                        new_claims.append(other_claim(rng, item, story, claimants, now))
+                Claim.objects.bulk_create(new_claims)
+                made += len(new_claims)
+            if progress:
+                progress(done)
+
+    # bulk_create sends no signals, drop what was cached from the old counts
+    bump_facet_version()
+    bump_item_version()
+    clear_queue_counts()
+    return SeedResult(users, items, made, time.monotonic() - started)
+
+
+def new_item(rng, now, days, students, claimants, staff, pool):
+    category = weighted(rng, CATEGORIES)
+    thing = rng.choice(THINGS[category])
+    color, brand = rng.choice(COLORS), rng.choice(BRANDS)
+    name = f'{color} {brand + " " if brand and rng.random() < 0.4 else ""}{thing}'
+    created = now - timedelta(days=days * rng.random() ** 1.5)  # more recent items than old ones
+    story = item_story(rng, now, created, claimants)
+    photo, derivatives = rng.choice(pool)
+
+    item = Item(
+        name=name,
+        category=category,
+        description=f'{color} {thing.lower()}, {rng.choice(DETAILS)}. {rng.choice(DETAILS).capitalize()}.',
+        location_found=weighted(rng, LOCATIONS),
+        date_found=timezone.localtime(created - timedelta(hours=rng.uniform(0, 48))).date(),
+        photo=photo,
+        photo_derivatives=derivatives,
+        status=story['status'],
+        submitted_by_id=rng.choice(students),
+        approved_by_id=rng.choice(staff) if 'approval_date' in story else None,
+        approval_date=story.get('approval_date'),
+        verified_date=story.get('verified_date'),
+        returned_to_id=story['claimant'] if story['status'] == 'returned' else None,
+        discard_date=story.get('discard_date'),
+        discard_reason=story.get('discard_reason', ''),
+        created_at=created,
+        updated_at=max(date for date in (created, story.get('approval_date'), story.get('verified_date'), story.get('discard_date')) if date),
+    )
+    return item, story
@@ -28,16 +28,20 @@ INSTALLED_APPS = [
     'accounts',
     'items',
     'claims',
+    'tasks',
 ]
 
 # Middleware
 MIDDLEWARE = [
+    'lostandfound.profiling.ServerTimingMiddleware',
+    'lostandfound.queries.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'lostandfound.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -47,7 +51,8 @@ ROOT_URLCONF = 'lostandfound.urls'
 # Templates
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates, timed for the Server-Timing header (see lostandfound/profiling.py)
+        'BACKEND': 'lostandfound.profiling.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -56,6 +61,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'assets': 'lostandfound.assets',
+            },
         },
     },
 ]
@@ -84,6 +92,39 @@ else:
         }
     }
 
+# Cache for fragments, search facets and queue counts. It must be shared by
+# every gunicorn worker so a save in one invalidates the others' fragments:
+# CACHE_BACKEND=file (the default, CACHE_LOCATION is a directory) or memcached
+# (CACHE_LOCATION is host:port, needs pymemcache). locmem keeps a cache per
+# process and only suits a single worker.
+CACHE_BACKEND = config('CACHE_BACKEND', default='file')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'lostandfound'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+if CACHE_BACKEND != 'memcached':
+    # Every item card is an entry, the default of 300 would keep evicting them
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int)}
+
+# Sessions and logged-in users come from the cache when every process shares
+# it, so most requests need no query for either. With the in-process cache a
+# logout or role change in one worker would go unnoticed by the others, so
+# both are read from the database then. SESSION_STORE can also be
+# 'signed_cookies' (no server-side storage, but a logout can't revoke copies
+# of the cookie), 'cached_db' or 'db'. See accounts/backends.py for the users.
+SHARED_CACHE = CACHE_BACKEND != 'locmem'
+SESSION_STORE = config('SESSION_STORE', default='cached_db' if SHARED_CACHE else 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_STORE}'
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=300 if SHARED_CACHE else 0, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -102,12 +143,82 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Bundles, content hashes, gzip and brotli copies (see lostandfound/assets.py)
+    'staticfiles': {'BACKEND': 'lostandfound.assets.BundledStaticFilesStorage'},
+}
+# Files missing from the manifest (collectstatic not run yet) keep their plain name
+WHITENOISE_MANIFEST_STRICT = False
+
+# Joined and minified into one file each by collectstatic, in this order
+STATIC_BUNDLES = {
+    'css/bundle.css': [
+        'css/base.css', 'css/layout.css', 'css/navigation.css', 'css/components.css', 'css/forms.css',
+        'css/buttons.css', 'css/items.css', 'css/claims.css', 'css/admin.css', 'css/home.css',
+        'css/registration.css', 'css/report.css', 'css/utilities.css', 'css/animations.css',
+        'css/responsive.css',
+    ],
+    'js/bundle.js': ['js/main.js'],
+}
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded files are served by lostandfound/media.py. MEDIA_ACCEL hands the
+# transfer to the front-end server: 'nginx' (X-Accel-Redirect to
+# MEDIA_ACCEL_LOCATION, an internal location aliased to MEDIA_ROOT) or
+# 'sendfile' (X-Sendfile, for Apache mod_xsendfile or lighttpd).
+# MEDIA_ACCESS_CHECK decides who may see a file, None serves them to anyone.
+MEDIA_ACCEL = config('MEDIA_ACCEL', default='')
+MEDIA_ACCEL_LOCATION = config('MEDIA_ACCEL_LOCATION', default='/protected-media/')
+MEDIA_ACCESS_CHECK = 'items.media.can_view'
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=60 * 60 * 24 * 30, cast=int)
+
+# Stream every upload to a temporary file in small chunks rather than buffering
+# small ones in memory, photos are then read from disk (see items/uploads.py)
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Set when `manage.py run_worker` runs next to the web server. Otherwise queued
+# tasks (photo sizes, removing unused photos) run in background threads of the
+# web process that queued them, or once due in any web process if that one
+# has restarted since (see tasks/queue.py).
+TASK_WORKER = config('TASK_WORKER', default=False, cast=bool)
+
+# Periodic jobs started by `manage.py run_scheduler` (see tasks/scheduler.py).
+# 'schedule' is a cron expression (minute hour day month weekday) in TIME_ZONE.
+# 'catch_up' is what happens to runs missed while no scheduler was up:
+# 'skip' them, run 'once' for all of them, or run 'all' of them.
+SCHEDULED_JOBS = {
+    'auto_discard_items': {
+        'schedule': '0 2 * * *',
+        'command': 'auto_discard_items',
+        'catch_up': 'once',
+    },
+    'clean_up_tasks': {
+        'schedule': '30 3 * * *',
+        'callable': 'tasks.scheduler.clean_up',
+        'catch_up': 'once',
+    },
+    'clear_expired_sessions': {
+        'schedule': '0 4 * * 0',
+        'command': 'clearsessions',
+        'catch_up': 'skip',
+    },
+}
+
+# SQL query inspection for development and staging (see lostandfound/queries.py):
+# logs N+1 query patterns and views going over their @query_budget.
+# With QUERY_BUDGET_STRICT a view over budget raises instead.
+QUERY_INSPECTOR = config('QUERY_INSPECTOR', default=DEBUG, cast=bool)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+
+# Request timing (see lostandfound/profiling.py): requests slower than this many
+# milliseconds are listed for staff, profiles requested with ?profile=1 are saved here
+SLOW_REQUEST_THRESHOLD = config('SLOW_REQUEST_THRESHOLD', default=500, cast=int)
+PROFILE_DIR = BASE_DIR / 'profiles'
+
 # Custom User model
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
@@ -0,0 +1,17 @@
+"""
+Settings for the server started by `manage.py run_benchmark`.
+
+Production-like (DEBUG off, no query inspection) but pointed at the
+throwaway benchmark database and media directory the command created.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+QUERY_INSPECTOR = False
+
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DB_NAME']
+MEDIA_ROOT = os.environ['BENCHMARK_MEDIA_ROOT']
@@ -0,0 +1,135 @@
+"""
+Test helpers for locking in how many queries each page runs.
+
+    class QueryCountTests(QueryCountTestMixin, TestCase):
+        query_count_urlconfs = ('items.urls', 'claims.urls', 'accounts.urls')
+
+        def test_query_counts(self):
+            self.client.force_login(self.staff)
+            self.assertQueryCounts({
+                'item_list': 6,
+                ('item_detail', self.item.pk): 5,
+                ...
+            })
+
+assertQueryCounts fails if a named URL in query_count_urlconfs has no
+expected count, so a new page can't be added without one, and reports every
+page whose count changed at once rather than stopping at the first.
+
+SeededTestCase gives the tests a small seeded school (lostandfound/seeding.py)
+and a staff account, so lists have rows in every state and an N+1 shows up
+as a changed count.
+"""
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.urls.resolvers import URLPattern, URLResolver, get_resolver
+
+from .queries import REPEAT_THRESHOLD, QueryLog
+
+
+def url_names(urlconf):
+    """Names of the URL patterns in `urlconf`, including any it includes"""
+    names = []
+    for pattern in get_resolver(urlconf).url_patterns:
+        if isinstance(pattern, URLResolver):
+            names.extend(url_names(pattern.urlconf_name))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(pattern.name)
+    return names
+
+
+class QueryCountTestMixin:
+    query_count_urlconfs = ()
+
+    def count_queries(self, url, method='get', data=None, **extra):
+        """(response, QueryLog) for one request made with self.client"""
+        with QueryLog() as log:
+            response = getattr(self.client, method)(url, data, **extra)
+        return response, log
+
+    def assertQueryCount(self, url, expected, method='get', data=None, **extra):
+        response, log = self.count_queries(url, method, data, **extra)
+        if log.count != expected:
+            self.fail(f'{url} ran {log.count} queries, expected {expected}:\n' + self._describe(log))
+        return response
+
+    def assertNoRepeatedQueries(self, url, threshold=REPEAT_THRESHOLD, method='get', data=None, **extra):
+        response, log = self.count_queries(url, method, data, **extra)
+        repeated = log.repeated(threshold)
+        if repeated:
+            self.fail(f'{url} repeats queries (N+1):\n' + '\n'.join(f'  {times}x {shape}' for shape, times in repeated))
+        return response
+
+    def assertQueryCounts(self, expected):
+        """
+        `expected` maps URL names, or (name, *args) for URLs with arguments,
+        to query counts for a GET by the logged-in test client.
+        """
+        covered = {key[0] if isinstance(key, tuple) else key for key in expected}
+        missing = [
+            name for urlconf in self.query_count_urlconfs
+            for name in url_names(urlconf) if name not in covered
+        ]
+        if missing:
+            self.fail(f'No expected query count for: {", ".join(missing)}')
+
+        mismatches = []
+        for key, count in expected.items():
+            name, *args = key if isinstance(key, tuple) else (key,)
+            url = reverse(name, args=args)
+            _, log = self.count_queries(url)
+            if log.count != count:
+                mismatches.append(f'{url} ({name}): {log.count} queries, expected {count}\n' + self._describe(log))
+        if mismatches:
+            self.fail('Query counts changed:\n' + '\n'.join(mismatches))
+
+    def _describe(self, log):
+        return '\n'.join(f'  {number}. {sql}' for number, (sql, _) in enumerate(log.queries, 1))
+
+
+class SeededTestCase(TestCase):
+    """
+    Seeded users, items and claims plus `self.staff`, photos in a temporary
+    MEDIA_ROOT and the cache in memory rather than in the project's cache/
+    directory (sessions and users still come from it, as with the default
+    shared cache). Query budgets are enforced, see lostandfound/queries.py.
+    """
+    seed_items = 200
+    seed_claims = 150
+    seed_users = 30
+    # Two months of history, so every queue has open reports and pending claims
+    seed_days = 60
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=media_root,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}},
+            # A view going over its @query_budget fails the test
+            QUERY_INSPECTOR=True,
+            QUERY_BUDGET_STRICT=True,
+        )
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        from .seeding import seed
+
+        seed(items=cls.seed_items, claims=cls.seed_claims, users=cls.seed_users, days=cls.seed_days)
+        cls.staff = get_user_model().objects.create_user(
+            'staff', 'staff@example.com', 'password123',
+            user_type='admin', is_staff=True, approval_status='approved',
+        )
+
+    def setUp(self):
+        # Counts are for a cold cache, whatever ran before
+        cache.clear()
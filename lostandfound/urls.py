@@ -17,14 +17,17 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from . import media, profiling
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('accounts.urls')),
     path('items/', include('items.urls')),
     path('claims/', include('claims.urls')),
+    path('staff/slow-requests/', profiling.slow_requests, name='slow_requests'),
+    path('staff/profiles/<str:name>/', profiling.download_profile, name='download_profile'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded photos, with access checks and X-Accel-Redirect/X-Sendfile (see media.py)
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', media.serve_media, name='media'))
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lostandfound.settings')
 
 application = get_wsgi_application()
+
+# Start building the in-memory typo search index now rather than on the first search (SQLite only)
+from items.fuzzy import warm_trigram_index  # noqa: E402
+
+warm_trigram_index()
+
+# Without a worker, run tasks left queued when the previous process stopped
+from tasks.queue import start_inline_sweeper  # noqa: E402
+
+start_inline_sweeper()
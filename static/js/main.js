@@ -385,6 +385,64 @@ document.addEventListener('DOMContentLoaded', function() {
 
 
 
+// LOAD MORE / INFINITE SCROLL (item grids and staff queues)
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-lf-items-grid], [data-lf-load-more-list]').forEach(setUpLoadMore);
+});
+
+function setUpLoadMore(list) {
+    let loading = false;
+    let observer = null;
+
+    function loadMore(button) {
+        if (loading) return;
+        loading = true;
+        button.classList.add('is-loading');
+
+        fetch(button.href, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(function(response) {
+                if (!response.ok) throw new Error('Request failed');
+                return response.text();
+            })
+            .then(function(html) {
+                // The response holds the next entries followed by a new button (if any)
+                const container = button.closest('[data-lf-load-more-container]');
+                const template = document.createElement('template');
+                template.innerHTML = html;
+                container.replaceWith(template.content);
+                loading = false;
+                watch();
+            })
+            .catch(function() {
+                // Fall back to a normal page load
+                window.location.href = button.href;
+            });
+    }
+
+    function watch() {
+        const button = list.querySelector('[data-lf-load-more]');
+        if (!button) return;
+
+        button.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadMore(button);
+        });
+
+        // Infinite scroll: load the next page as soon as the button comes into view
+        if ('IntersectionObserver' in window) {
+            if (observer) observer.disconnect();
+            observer = new IntersectionObserver(function(entries) {
+                if (entries[0].isIntersecting) loadMore(button);
+            }, { rootMargin: '200px' });
+            observer.observe(button);
+        }
+    }
+
+    watch();
+}
+
+
+
 // FORM VALIDATION ENHANCEMENTS
 document.addEventListener('DOMContentLoaded', function() {
     const forms = document.querySelectorAll('form');
@@ -546,4 +604,14 @@ document.addEventListener('DOMContentLoaded', function() {
     document.addEventListener('focusout', function(e) {
         e.target.classList.remove('focus-visible');
     });
-});
\ No newline at end of file
+});
+
+
+// BULK ACTIONS (staff queues): "Select all" ticks every loaded entry of its form
+document.addEventListener('change', function(e) {
+    if (!e.target.matches('[data-lf-select-all]')) return;
+
+    e.target.closest('form').querySelectorAll('input[name="selected"]').forEach(function(box) {
+        box.checked = e.target.checked;
+    });
+});
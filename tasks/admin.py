@@ -0,0 +1,28 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import JobRun, Task
+
+# Register your models here.
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['created_at', 'updated_at', 'finished_at', 'locked_by', 'locked_until']
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks')
+    def retry_tasks(self, request, queryset):
+        retried = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_after=timezone.now(), finished_at=None, updated_at=timezone.now(),
+        )
+        self.message_user(request, f'{retried} task(s) queued again.')
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ['job', 'scheduled_for', 'status', 'duration', 'started_at', 'scheduler']
+    list_filter = ['job', 'status']
+    date_hierarchy = 'scheduled_for'
+    readonly_fields = ['job', 'scheduled_for', 'status', 'started_at', 'finished_at', 'duration', 'output', 'scheduler']
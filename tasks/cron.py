@@ -0,0 +1,107 @@
+"""
+Cron-style schedules: "minute hour day-of-month month day-of-week".
+
+Each field is *, a number, a range (1-5), a step (*/15, 0-30/10) or a list
+of those (1,15,30). Days of the week run 0-6 from Sunday (7 also means
+Sunday). As in cron, if both day fields are restricted a day matching either
+one counts.
+
+    CronSchedule('0 2 * * *').next_after(now)   # next 2:00 AM
+"""
+from collections import deque
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day of month', 1, 31),
+    ('month', 1, 12),
+    ('day of week', 0, 7),
+)
+
+
+class InvalidSchedule(ValueError):
+    pass
+
+
+def _parse_field(text, name, low, high):
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise InvalidSchedule(f'Bad step in {name} field: {text!r}')
+            step = int(step_text)
+
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            if not (start_text.isdigit() and end_text.isdigit()):
+                raise InvalidSchedule(f'Bad range in {name} field: {text!r}')
+            start, end = int(start_text), int(end_text)
+        elif part.isdigit():
+            start = end = int(part)
+            if step != 1:
+                end = high
+        else:
+            raise InvalidSchedule(f'Bad {name} field: {text!r}')
+
+        if not low <= start <= end <= high:
+            raise InvalidSchedule(f'{name.capitalize()} out of range ({low}-{high}): {text!r}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise InvalidSchedule(f'Expected 5 fields (minute hour day month weekday): {expression!r}')
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, *field) for text, field in zip(fields, FIELDS)
+        )
+        # Cron counts Sunday as 0 (or 7), Python's weekday() counts Monday as 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __str__(self):
+        return self.expression
+
+    def _day_matches(self, day):
+        day_of_month = day.day in self.days
+        day_of_week = day.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_of_month and day_of_week
+        return day_of_month or day_of_week
+
+    def next_after(self, moment):
+        """The first time strictly after `moment` (aware) that the schedule fires"""
+        local = timezone.localtime(moment).replace(tzinfo=None)
+        day = local.date()
+        after = local.time()
+
+        # At most 4 years ahead, enough to find a February 29th
+        for _ in range(366 * 4 + 1):
+            if day.month in self.months and self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        if day > local.date() or time(hour, minute) > after:
+                            return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+            day += timedelta(days=1)
+        raise InvalidSchedule(f'Schedule never fires: {self.expression!r}')
+
+    def times_between(self, start, end, limit=100):
+        """The last `limit` times the schedule fired after `start`, up to and including `end`"""
+        times = deque(maxlen=limit)
+        moment = self.next_after(start)
+        while moment <= end:
+            times.append(moment)
+            moment = self.next_after(moment)
+        return list(times)
@@ -0,0 +1,135 @@
+"""
+Management command that starts the periodic jobs in settings.SCHEDULED_JOBS
+Usage: python manage.py run_scheduler [--list] [--once]
+
+Safe to run on every instance: only the one holding the database lock starts
+jobs, the others wait to take over (see tasks/scheduler.py). Jobs run in
+threads of this process and are recorded as JobRun rows.
+"""
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.queue import worker_id
+from tasks.scheduler import (
+    acquire_leadership, due_runs, execute_all, last_run, load_jobs, release_leadership, start_run,
+)
+
+# Seconds between checks, well inside the lock's lifetime
+TICK = 15
+
+
+class Command(BaseCommand):
+    help = 'Runs the periodic jobs declared in settings.SCHEDULED_JOBS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Show each job with its last and next run, then exit',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Start whatever is due, wait for it to finish and exit',
+        )
+
+    def handle(self, *args, **options):
+        jobs = load_jobs()
+
+        if options['list']:
+            self.list_jobs(jobs)
+            return
+
+        self.stopping = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        scheduler = worker_id()
+        executor = ThreadPoolExecutor(max_workers=max(len(jobs), 1), thread_name_prefix='scheduled-job')
+        running = {}
+        leader = False
+
+        self.stdout.write(self.style.SUCCESS(f'Scheduler {scheduler} started with {len(jobs)} job(s). Press Ctrl+C to stop.'))
+
+        try:
+            while not self.stopping:
+                for name, future in list(running.items()):
+                    if future.done():
+                        del running[name]
+                        self.report(future)
+
+                was_leader, leader = leader, acquire_leadership(scheduler)
+                if leader != was_leader:
+                    self.stdout.write(self.style.WARNING(
+                        'This scheduler is now starting jobs.' if leader else 'Another scheduler took over.'
+                    ))
+
+                if leader:
+                    for job in jobs:
+                        # A job still running from its last time is not started again
+                        if job.name not in running:
+                            runs = self.start_due_runs(job, scheduler)
+                            if runs:
+                                running[job.name] = executor.submit(execute_all, job, runs)
+
+                if options['once']:
+                    break
+                self.sleep(TICK)
+        finally:
+            if running:
+                self.stdout.write(f'Waiting for {len(running)} running job(s) to finish...')
+            executor.shutdown(wait=True)
+            for future in running.values():
+                self.report(future)
+            release_leadership(scheduler)
+
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped.'))
+
+    def start_due_runs(self, job, scheduler):
+        """Record the runs of `job` that are due, returns the ones to execute"""
+        runs = []
+        for scheduled_for, action in due_runs(job):
+            if action == 'skip':
+                if start_run(job, scheduled_for, scheduler, status='skipped'):
+                    self.stdout.write(self.style.WARNING(f'  - {job.name}: skipped missed run for {timezone.localtime(scheduled_for):%Y-%m-%d %H:%M}'))
+                continue
+
+            run = start_run(job, scheduled_for, scheduler)
+            if run:
+                self.stdout.write(f'  → {job.name}: starting run for {timezone.localtime(scheduled_for):%Y-%m-%d %H:%M}')
+                runs.append(run)
+        return runs
+
+    def report(self, future):
+        for run in future.result():
+            run.refresh_from_db()
+            if run.status == 'succeeded':
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {run.job} finished in {run.duration:.1f}s'))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ {run.job} failed after {run.duration:.1f}s'))
+
+    def list_jobs(self, jobs):
+        now = timezone.now()
+        for job in jobs:
+            previous = last_run(job)
+            if previous:
+                duration = f', {previous.duration:.1f}s' if previous.duration is not None else ''
+                last = f'{timezone.localtime(previous.scheduled_for):%Y-%m-%d %H:%M} ({previous.get_status_display()}{duration})'
+            else:
+                last = 'never'
+            self.stdout.write(self.style.SUCCESS(f'{job.name}'))
+            self.stdout.write(f'  Schedule: {job.schedule} (catch up: {job.catch_up})')
+            self.stdout.write(f'  Last run: {last}')
+            self.stdout.write(f'  Next run: {timezone.localtime(job.schedule.next_after(now)):%Y-%m-%d %H:%M}')
+
+    def sleep(self, seconds):
+        end = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < end:
+            time.sleep(min(1, end - time.monotonic()))
+
+    def stop(self, signum, frame):
+        self.stopping = True
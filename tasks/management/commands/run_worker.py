@@ -0,0 +1,134 @@
+"""
+Management command that runs queued background tasks
+Usage: python manage.py run_worker [--concurrency 2] [--pool thread|process] [--burst]
+
+Keeps up to --concurrency tasks running at once in a thread pool (the
+default, fine for tasks that mostly wait on the database or disk) or a
+process pool (for CPU-heavy tasks). Stops cleanly on Ctrl+C or SIGTERM after
+the running tasks finish. With --burst it exits once the queue is empty,
+which suits a scheduled job.
+"""
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tasks import process
+from tasks.queue import LEASE, claim_tasks, release_expired_leases, renew_leases, run_task, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Runs background tasks from the database task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Number of tasks to run at the same time (default: 2)',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Run tasks in threads or in separate processes (default: thread)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between checks when the queue is empty (default: 1)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once there are no more tasks to run',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        self.stopping = False
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        worker = worker_id()
+        target = run_task
+        if options['pool'] == 'process':
+            # Don't hand this process's database connection to the children
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=process.init_process,
+            )
+            target = process.run_task
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task-worker')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Worker {worker} started ({concurrency} {options["pool"]} workers). Press Ctrl+C to stop.'
+        ))
+
+        running = {}
+        completed = 0
+        last_upkeep = 0
+
+        try:
+            while not self.stopping:
+                # Renew our leases and take back tasks from dead workers, a few times per lease
+                if time.monotonic() - last_upkeep > LEASE.total_seconds() / 5:
+                    renew_leases(worker, [task.pk for task in running.values()])
+                    released = release_expired_leases()
+                    if released:
+                        self.stdout.write(self.style.WARNING(f'Took back {released} task(s) from stopped workers.'))
+                    last_upkeep = time.monotonic()
+
+                for task in claim_tasks(worker, concurrency - len(running)):
+                    running[executor.submit(target, task.pk, task.locked_by)] = task
+
+                if not running:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed += self.report(running.pop(future), future)
+        finally:
+            if running:
+                self.stdout.write(f'Waiting for {len(running)} running task(s) to finish...')
+            executor.shutdown(wait=True)
+            for future, task in running.items():
+                completed += self.report(task, future)
+
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped after {completed} task(s).'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def report(self, task, future):
+        """Print the outcome of a finished task, returns 1 if it ran"""
+        try:
+            outcome = future.result()
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f'  ✗ {task.name} (#{task.pk}): worker error: {error}'))
+            return 0
+
+        if outcome is None:
+            return 0
+
+        succeeded, seconds = outcome
+        if succeeded:
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {task.name} (#{task.pk}) in {seconds * 1000:.0f}ms'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'  ✗ {task.name} (#{task.pk}) failed on attempt {task.attempts} of {task.max_attempts}'
+            ))
+        return 1
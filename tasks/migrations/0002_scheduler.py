@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('owner', models.CharField(blank=True, max_length=100)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=100)),
+                ('scheduled_for', models.DateTimeField(help_text='The schedule time this run is for')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped (missed)')], default='running', max_length=20)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, help_text='Seconds', null=True)),
+                ('output', models.TextField(blank=True, help_text='What the job printed or returned, or the error')),
+                ('scheduler', models.CharField(blank=True, help_text='Scheduler process that started the run', max_length=100)),
+            ],
+            options={
+                'ordering': ['-scheduled_for'],
+                'indexes': [models.Index(fields=['job', '-scheduled_for'], name='jobrun_job_scheduled_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'scheduled_for'), name='jobrun_unique_slot')],
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+from django.db import models
+from django.utils import timezone
+
+
+# Create your models here.
+class Task(models.Model):
+    """A function call queued to run outside the request, see tasks/queue.py"""
+
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+
+    # What to run: the dotted path of a function decorated with @task
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not started before this time (used for retry backoff)")
+
+    # Retries
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    # Lease held by the worker running the task. If the worker dies, the lease
+    # runs out and another worker picks the task up again.
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers looking for the next task to run
+            models.Index(
+                fields=['run_after', 'id'], name='task_queued_idx',
+                condition=models.Q(status='queued'),
+            ),
+            # Workers looking for tasks whose worker died
+            models.Index(
+                fields=['locked_until'], name='task_running_lease_idx',
+                condition=models.Q(status='running'),
+            ),
+            # Clean-up of old finished tasks
+            models.Index(fields=['status', 'finished_at'], name='task_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class JobRun(models.Model):
+    """One run of a periodic job from settings.SCHEDULED_JOBS, see tasks/scheduler.py"""
+
+    STATUS_CHOICES = (
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped (missed)'),
+    )
+
+    job = models.CharField(max_length=100)
+    scheduled_for = models.DateTimeField(help_text="The schedule time this run is for")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Seconds")
+
+    output = models.TextField(blank=True, help_text="What the job printed or returned, or the error")
+    scheduler = models.CharField(max_length=100, blank=True, help_text="Scheduler process that started the run")
+
+    class Meta:
+        ordering = ['-scheduled_for']
+        constraints = [
+            # A schedule time is only ever run once, however many schedulers are up
+            models.UniqueConstraint(fields=['job', 'scheduled_for'], name='jobrun_unique_slot'),
+        ]
+        indexes = [
+            models.Index(fields=['job', '-scheduled_for'], name='jobrun_job_scheduled_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} @ {self.scheduled_for:%Y-%m-%d %H:%M} ({self.get_status_display()})"
+
+
+class SchedulerLock(models.Model):
+    """Lease held by the one scheduler process allowed to start jobs"""
+
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=100, blank=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner or 'nobody'} until {self.expires_at}"
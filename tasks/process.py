@@ -0,0 +1,20 @@
+"""
+Entry points for run_worker's process pool.
+
+Child processes are started fresh, so nothing here may import models before
+django.setup() has run in the child.
+"""
+import signal
+
+import django
+
+
+def init_process():
+    # Load Django, and leave Ctrl+C to the parent, which waits for running tasks
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def run_task(task_id, token):
+    from .queue import run_task
+    return run_task(task_id, token)
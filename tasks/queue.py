@@ -0,0 +1,287 @@
+"""
+A small background task queue kept in the app's own database.
+
+Decorate a function with @task and call `func.enqueue(*args, **kwargs)` to
+run it later in `manage.py run_worker` instead of inside the request.
+Arguments are stored as JSON, so pass ids rather than model instances.
+Because the queue is an ordinary table, a task enqueued inside a transaction
+only becomes visible to workers if that transaction commits.
+
+Workers lease tasks by marking them 'running' with their own lock token and
+a lease expiry:
+- On Postgres the next tasks are picked with SELECT ... FOR UPDATE SKIP
+  LOCKED, so several workers never wait on each other.
+- SQLite has no row locks, but it runs one write at a time, so a single
+  UPDATE ... WHERE id IN (next ids) AND status = 'queued' claims rows
+  atomically.
+
+A task that raises is retried with exponential backoff until it reaches
+max_attempts. A task whose worker dies is picked up again once its lease
+runs out, so tasks should be safe to run twice.
+
+Without a worker (TASK_WORKER off, the default) each task is run in a
+background thread of the process that queued it, once its transaction
+commits and the task is due. It takes the same lease a worker would, so
+starting a worker later never runs a task twice. Tasks still waiting when
+that process exits stay queued, and web processes look for due tasks every
+INLINE_SWEEP_SECONDS (see start_inline_sweeper), so a restart doesn't lose
+them.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold a task before others assume it died.
+# Running workers renew their leases well before this runs out.
+LEASE = timedelta(minutes=5)
+
+# Retry delays: 10s, 20s, 40s, ... up to an hour, with some jitter
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 60 * 60
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Finished tasks are kept this long for inspection in the admin
+FINISHED_RETENTION = timedelta(days=7)
+
+# Most tasks run at once in a web process that has no worker
+INLINE_CONCURRENCY = 2
+
+# How often a web process without a worker runs due tasks no timer of its own is waiting for
+INLINE_SWEEP_SECONDS = 60
+INLINE_SWEEP_BATCH = 100
+
+# Functions that may be run by name, filled in by @task
+registry = {}
+
+_inline_slots = threading.BoundedSemaphore(INLINE_CONCURRENCY)
+
+
+class NotATask(Exception):
+    pass
+
+
+def task(func=None, *, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Register `func` as a background task and give it an `enqueue` method:
+
+        @task
+        def send_reminder(user_id): ...
+
+        send_reminder.enqueue(user.pk)
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        registry[name] = func
+        func.task_name = name
+        func.enqueue = lambda *args, **kwargs: enqueue(name, args, kwargs, max_attempts=max_attempts)
+        return func
+
+    return decorator(func) if func is not None else decorator
+
+
+def enqueue(name, args=(), kwargs=None, run_after=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Queue the registered task `name`. Returns the Task row."""
+    queued = Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts,
+    )
+    if not settings.TASK_WORKER:
+        transaction.on_commit(lambda: run_inline_later(queued.pk, queued.run_after))
+    return queued
+
+
+def resolve(name):
+    """The function registered as `name`, importing its module if needed"""
+    if name not in registry:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    if name not in registry:
+        raise NotATask(f'{name} is not a registered task')
+    return registry[name]
+
+
+def worker_id():
+    return f'{socket.gethostname()[:60]}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """Seconds to wait before attempt number `attempts + 1`"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.75, 1.25)
+
+
+def lease_fields(token, now):
+    """Fields that mark a task as taken by the holder of `token`"""
+    return {
+        'status': 'running',
+        'locked_by': token,
+        'locked_until': now + LEASE,
+        'attempts': F('attempts') + 1,
+        'updated_at': now,
+    }
+
+
+def claim_tasks(worker, limit):
+    """Lease up to `limit` tasks that are due for `worker`. Returns the claimed Tasks."""
+    if limit <= 0:
+        return []
+
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    due = Task.objects.filter(status='queued', run_after__lte=now).order_by('run_after', 'id')
+    lease = lease_fields(token, now)
+
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            # Rows another worker is claiming right now are skipped, not waited for
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            if not ids:
+                return []
+            Task.objects.filter(id__in=ids).update(**lease)
+        return list(Task.objects.filter(id__in=ids).order_by('run_after', 'id'))
+
+    # One statement, so no other writer can claim the same rows in between
+    claimed = Task.objects.filter(id__in=due.values('id')[:limit], status='queued').update(**lease)
+    if not claimed:
+        return []
+    return list(Task.objects.filter(status='running', locked_by=token).order_by('run_after', 'id'))
+
+
+def renew_leases(worker, task_ids):
+    """Keep the leases on tasks this worker is still running"""
+    if task_ids:
+        Task.objects.filter(
+            id__in=task_ids, status='running', locked_by__startswith=f'{worker}:'
+        ).update(locked_until=timezone.now() + LEASE)
+
+
+def release_expired_leases():
+    """Requeue (or fail) tasks whose worker stopped renewing its lease"""
+    now = timezone.now()
+    expired = Task.objects.filter(status='running', locked_until__lt=now)
+    failed = expired.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_until=None, finished_at=now,
+        last_error='Worker stopped while running the task', updated_at=now,
+    )
+    requeued = expired.update(status='queued', locked_by='', locked_until=None, run_after=now, updated_at=now)
+    return requeued + failed
+
+
+def run_task(task_id, token):
+    """
+    Run one claimed task and record the outcome. Returns (succeeded, seconds),
+    or None if the lease was lost before the task started.
+    """
+    started = time.monotonic()
+    try:
+        task = Task.objects.filter(pk=task_id, status='running', locked_by=token).first()
+        if task is None:
+            return None
+
+        # Later updates only apply while this worker still holds the lease
+        mine = Task.objects.filter(pk=task_id, locked_by=token)
+        try:
+            resolve(task.name)(*task.args, **task.kwargs)
+        except Exception as error:
+            now = timezone.now()
+            retry = task.attempts < task.max_attempts and not isinstance(error, NotATask)
+            logger.exception('Task %s (%s) failed on attempt %s', task.pk, task.name, task.attempts)
+            mine.update(
+                status='queued' if retry else 'failed',
+                run_after=now + timedelta(seconds=retry_delay(task.attempts)) if retry else task.run_after,
+                finished_at=None if retry else now,
+                last_error=traceback.format_exc(),
+                locked_by='',
+                locked_until=None,
+                updated_at=now,
+            )
+            return False, time.monotonic() - started
+
+        now = timezone.now()
+        mine.update(status='succeeded', finished_at=now, last_error='', locked_by='', locked_until=None, updated_at=now)
+        return True, time.monotonic() - started
+    finally:
+        # Worker threads and processes each have their own connection
+        connections.close_all()
+
+
+def run_inline_later(task_id, run_after):
+    """Run task `task_id` in a thread of this process once it is due, for setups without a worker"""
+    delay = max((run_after - timezone.now()).total_seconds(), 0)
+    timer = threading.Timer(delay, run_inline, [task_id])
+    # Waiting tasks don't keep the process alive, they stay queued
+    timer.daemon = True
+    timer.start()
+
+
+def run_inline(task_id):
+    with _inline_slots:
+        token = f'{worker_id()}:inline-{uuid.uuid4().hex[:8]}'
+        claimed = Task.objects.filter(pk=task_id, status='queued').update(**lease_fields(token, timezone.now()))
+        if not claimed:
+            # A worker got it first
+            connections.close_all()
+            return
+        outcome = run_task(task_id, token)
+
+    if outcome is not None and not outcome[0]:
+        # run_task queued it again with a backoff, unless it ran out of attempts
+        retry_at = Task.objects.filter(pk=task_id, status='queued').values_list('run_after', flat=True).first()
+        connections.close_all()
+        if retry_at is not None:
+            run_inline_later(task_id, retry_at)
+
+
+def start_inline_sweeper():
+    """
+    Without a worker, run due tasks queued by processes that have exited
+    since (a restart drops their timers). Called when a web process starts,
+    see lostandfound/wsgi.py.
+    """
+    if not settings.TASK_WORKER:
+        threading.Thread(target=sweep_inline, name='inline-task-sweeper', daemon=True).start()
+
+
+def sweep_inline():
+    while True:
+        try:
+            release_expired_leases()
+            due = Task.objects.filter(status='queued', run_after__lte=timezone.now()).order_by('run_after', 'id')
+            for task_id in list(due.values_list('id', flat=True)[:INLINE_SWEEP_BATCH]):
+                # Claimed atomically, a task some other process runs first is skipped
+                run_inline(task_id)
+        except Exception:
+            logger.exception('Running queued tasks inline failed')
+        finally:
+            connections.close_all()
+        time.sleep(INLINE_SWEEP_SECONDS)
+
+
+def purge_finished_tasks(older_than=FINISHED_RETENTION):
+    """Delete tasks that finished more than `older_than` ago, returns how many"""
+    deleted, _ = Task.objects.filter(
+        status__in=['succeeded', 'failed'], finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
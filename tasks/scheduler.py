@@ -0,0 +1,176 @@
+"""
+Periodic jobs without an external cron.
+
+Jobs are declared in settings.SCHEDULED_JOBS and started by
+`manage.py run_scheduler`. Any number of scheduler processes can run. They
+take turns holding a lease on a SchedulerLock row, and only the holder starts
+jobs. If it stops renewing the lease, another one takes over within LOCK_TTL.
+As a second guard, every run is a JobRun row that is unique per (job,
+schedule time), so a schedule time can never start twice.
+
+JobRun rows are also the run history: status, duration and output of each run.
+A job's last JobRun says when it last ran. Schedule times missed since then,
+for example while no scheduler was up, are handled by the job's catch_up
+policy:
+- 'skip': record the missed run as skipped and wait for the next one
+- 'once': run once now for all of them (the default)
+- 'all': run once for each missed time, oldest first (at most MAX_CATCH_UP)
+"""
+import io
+import logging
+import time
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cron import CronSchedule, InvalidSchedule
+from .models import JobRun, SchedulerLock
+from .queue import purge_finished_tasks
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = 'scheduler'
+LOCK_TTL = timedelta(seconds=60)
+
+# A run starting this long after its schedule time still counts as on time
+GRACE = timedelta(minutes=5)
+
+CATCH_UP_POLICIES = ('skip', 'once', 'all')
+MAX_CATCH_UP = 24
+
+# Keep this much run history
+JOB_RUN_RETENTION = timedelta(days=90)
+
+# Job output stored on the JobRun is cut to its last this many characters
+MAX_OUTPUT = 10000
+
+# `command` (+ `args`) is a management command, `callable` a dotted path, exactly one is set
+Job = namedtuple('Job', ['name', 'schedule', 'catch_up', 'command', 'args', 'callable'])
+
+
+def load_jobs():
+    """Jobs from settings.SCHEDULED_JOBS, checked"""
+    jobs = []
+    for name, options in getattr(settings, 'SCHEDULED_JOBS', {}).items():
+        try:
+            schedule = CronSchedule(options['schedule'])
+        except (KeyError, InvalidSchedule) as error:
+            raise ImproperlyConfigured(f'SCHEDULED_JOBS[{name!r}] needs a valid cron "schedule": {error}')
+
+        catch_up = options.get('catch_up', 'once')
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ImproperlyConfigured(f'SCHEDULED_JOBS[{name!r}]["catch_up"] must be one of {", ".join(CATCH_UP_POLICIES)}')
+
+        if ('command' in options) == ('callable' in options):
+            raise ImproperlyConfigured(f'SCHEDULED_JOBS[{name!r}] needs either a "command" or a "callable"')
+
+        jobs.append(Job(
+            name=name,
+            schedule=schedule,
+            catch_up=catch_up,
+            command=options.get('command'),
+            args=list(options.get('args', [])),
+            callable=options.get('callable'),
+        ))
+    return jobs
+
+
+def acquire_leadership(owner):
+    """Take or renew the scheduler lease. Returns True while `owner` is the leader."""
+    now = timezone.now()
+    SchedulerLock.objects.get_or_create(name=LOCK_NAME, defaults={'expires_at': now - LOCK_TTL})
+    return bool(
+        SchedulerLock.objects.filter(name=LOCK_NAME)
+        .filter(Q(owner=owner) | Q(expires_at__lt=now))
+        .update(owner=owner, expires_at=now + LOCK_TTL)
+    )
+
+
+def release_leadership(owner):
+    SchedulerLock.objects.filter(name=LOCK_NAME, owner=owner).update(owner='', expires_at=timezone.now())
+
+
+def last_run(job):
+    return JobRun.objects.filter(job=job.name).order_by('-scheduled_for').first()
+
+
+def due_runs(job, now=None):
+    """
+    [(schedule time, 'run' or 'skip')] for `job` as of `now`. A job that has
+    never run only looks back GRACE, older schedule times don't count as missed.
+    """
+    now = now or timezone.now()
+    previous = last_run(job)
+    since = previous.scheduled_for if previous else now - GRACE
+
+    times = job.schedule.times_between(since, now, limit=MAX_CATCH_UP)
+    if not times:
+        return []
+
+    latest = times[-1]
+    if job.catch_up == 'all':
+        return [(moment, 'run') for moment in times]
+    if job.catch_up == 'once' or now - latest <= GRACE:
+        return [(latest, 'run')]
+    return [(latest, 'skip')]
+
+
+def start_run(job, scheduled_for, scheduler, status='running'):
+    """Record a run of `job`, or return None if that schedule time was already taken"""
+    try:
+        with transaction.atomic():
+            return JobRun.objects.create(job=job.name, scheduled_for=scheduled_for, status=status, scheduler=scheduler)
+    except IntegrityError:
+        return None
+
+
+def execute(job, run):
+    """Run `job` for the started JobRun `run` and record the outcome"""
+    started = time.monotonic()
+    try:
+        if job.command:
+            output = io.StringIO()
+            call_command(job.command, *job.args, stdout=output, stderr=output)
+            output = output.getvalue()
+        else:
+            result = import_string(job.callable)()
+            output = '' if result is None else str(result)
+        status = 'succeeded'
+    except Exception:
+        logger.exception('Scheduled job %s failed', job.name)
+        output = traceback.format_exc()
+        status = 'failed'
+
+    JobRun.objects.filter(pk=run.pk).update(
+        status=status,
+        finished_at=timezone.now(),
+        duration=time.monotonic() - started,
+        output=output[-MAX_OUTPUT:],
+    )
+    run.status = status
+    return run
+
+
+def execute_all(job, runs):
+    """Run `job` once for each of `runs`, in order. Used from the scheduler's threads."""
+    try:
+        return [execute(job, run) for run in runs]
+    finally:
+        connections.close_all()
+
+
+def clean_up():
+    """Delete finished tasks and old job history"""
+    tasks = purge_finished_tasks()
+    runs, _ = JobRun.objects.filter(
+        scheduled_for__lt=timezone.now() - JOB_RUN_RETENTION
+    ).exclude(status='running').delete()
+    return f'Deleted {tasks} finished tasks and {runs} job runs'